@@ -39,12 +39,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'accounts.middleware.TimingMiddleware',  # zuerst: misst den ganzen Request (Server-Timing, /metrics/)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.middleware.AccountUserMiddleware',  # dekodiert das Login-Cookie einmal pro Request
 ]
 
 ROOT_URLCONF = 'DjangoProject.urls'
@@ -119,3 +121,55 @@ STATIC_URL = 'static/'
 
 # Use cookie-based sessions so no django_session DB table is required
 SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'  # Sessions werden signiert in Cookies gespeichert
+
+# In-Process-Cache für accounts.json / work_reports.json (accounts/storage.py); in Tests ggf. False setzen
+ACCOUNTS_STORAGE_CACHE = True
+
+# Speicher-Backend für work_reports.json: 'json' (Datei bei jeder Änderung komplett neu schreiben)
+# oder 'journal' (Änderungen an work_reports.journal.jsonl anhängen, work_reports.json ist der Snapshot)
+ACCOUNTS_REPORTS_BACKEND = 'json'
+# ab dieser Journal-Größe (Bytes) wird im Hintergrund kompaktiert; manuell: python manage.py compact_reports
+ACCOUNTS_JOURNAL_COMPACT_BYTES = 8 * 1024 * 1024
+# Write-Behind für add_report: Reports sammeln und von einem Writer-Thread gemeinsam schreiben lassen
+# (spätestens nach ..._SECONDS oder ab ..._BATCH wartenden Reports). Lesen im selben Prozess sieht sie
+# sofort, andere Prozesse erst nach dem Schreiben; beim Beenden wird die Warteschlange geleert.
+ACCOUNTS_REPORTS_WRITE_BEHIND = False
+ACCOUNTS_REPORTS_WRITE_BEHIND_SECONDS = 0.05
+ACCOUNTS_REPORTS_WRITE_BEHIND_BATCH = 500
+# Ablage der Reports: 'single' (alles in work_reports.json) oder 'sharded' (work_reports/<nnnn>.json, jeder
+# Nutzer in genau einem von ACCOUNTS_REPORTS_SHARDS Shards; Änderungen eines Nutzers schreiben nur seinen Shard).
+# Bestehende Daten umziehen (Server vorher stoppen): python manage.py shard_reports [--shards N] bzw. --merge zurück
+ACCOUNTS_REPORTS_LAYOUT = 'single'
+ACCOUNTS_REPORTS_SHARDS = 64
+
+# 'json' (accounts.json / work_reports.json) oder 'sqlite' (Tabellen in DATABASES, siehe accounts/sqlite_storage.py);
+# wird beim Import von accounts.storage gelesen. Bestehende Daten übernehmen: python manage.py import_json_storage
+ACCOUNTS_STORAGE_BACKEND = 'json'
+
+# Admin-Export aller Nutzer (accounts/bulk_export.py): Anzahl Hintergrund-Threads und
+# wie lange fertige Archive unter BASE_DIR/exports/ aufbewahrt werden (Sekunden)
+ACCOUNTS_EXPORT_WORKERS = 2
+ACCOUNTS_EXPORT_KEEP_SECONDS = 24 * 60 * 60
+
+# Passwörter (accounts/passwords.py): PBKDF2-SHA256-Iterationen (Arbeitsfaktor). Nach einer Änderung
+# werden bestehende Hashes beim nächsten erfolgreichen Login neu berechnet (ebenso Klartext-Altbestand).
+ACCOUNTS_PASSWORD_ITERATIONS = 1_000_000
+# erfolgreiche Prüfungen so viele Sekunden im Prozess merken (0 = aus); Größe des Prüf-Thread-Pools
+# für async Views über ACCOUNTS_PASSWORD_WORKERS (Standard: Anzahl CPUs)
+ACCOUNTS_PASSWORD_CACHE_SECONDS = 300
+
+# Threads für Datei-/Datenbankzugriffe der async Views (accounts/storage.py, Async-API). Wartende
+# Requests belegen unter ASGI keinen Thread, begrenzt wird nur die Zahl gleichzeitiger Zugriffe.
+ACCOUNTS_STORAGE_WORKERS = 4
+
+# Zeitmessung (accounts/middleware.py TimingMiddleware, Histogramme unter /metrics/):
+# Server-Timing-Header mitsenden (verrät interne Laufzeiten -> nur in Entwicklung)
+ACCOUNTS_SERVER_TIMING = DEBUG
+# Stichproben mit cProfile: Anteil der Requests (0 = aus); gespeichert werden nur Requests ab
+# ACCOUNTS_PROFILE_SLOW_MS als .prof-Datei in ACCOUNTS_PROFILE_DIR (auswerten z.B. mit python -m pstats)
+ACCOUNTS_PROFILE_SAMPLE_RATE = 0
+ACCOUNTS_PROFILE_SLOW_MS = 500
+ACCOUNTS_PROFILE_DIR = BASE_DIR / 'profiles'
+# /metrics/ ist nur für Admins; ohne Login zusätzlich für diese Client-Adressen (REMOTE_ADDR). Hinter einem
+# Reverse-Proxy auf demselben Rechner ist das für alle Requests 127.0.0.1 -> dann leer lassen
+ACCOUNTS_METRICS_ALLOWED_IPS = []
@@ -0,0 +1,215 @@
+"""
+Admin-Export aller Nutzer als Hintergrund-Job.
+
+Der Request legt nur den Job an (start_job) und kehrt sofort zurück; ein Thread-Pool schreibt
+das Archiv (ZIP) nach <BASE_DIR>/exports/<job_id>/. Der Fortschritt steht in job.json im selben
+Verzeichnis, damit ihn jeder Worker-Prozess lesen kann (nicht nur der, der den Job ausführt).
+
+Layouts:
+  per_user  -> eine Datei pro Nutzer im ZIP (<username>.<format>, eindeutig gemacht, siehe _member_name)
+  combined  -> eine Datei all_reports.<format> mit den Reports aller Nutzer (nur json/ndjson,
+               weil nur dort der username pro Report erhalten bleibt)
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from . import exports, storage
+
+EXPORT_DIR = os.path.join(str(settings.BASE_DIR), 'exports')
+
+FORMATS = ('json', 'csv', 'xml', 'ndjson')
+COMBINED_FORMATS = ('json', 'ndjson')
+LAYOUTS = ('per_user', 'combined')
+
+_JOB_ID = re.compile(r'[0-9a-f]{32}')  # nur IDs aus uuid4().hex (verhindert Pfade wie ../)
+
+_executor = None
+_executor_lock = threading.Lock()
+_status_lock = threading.Lock()  # serialisiert Updates von job.json innerhalb des Prozesses
+
+
+def _pool():
+    # Pool wird erst beim ersten Job angelegt; Größe über ACCOUNTS_EXPORT_WORKERS (Standard 2)
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'ACCOUNTS_EXPORT_WORKERS', 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='accounts-export')
+        return _executor
+
+
+def _job_dir(job_id):
+    return os.path.join(EXPORT_DIR, job_id)
+
+
+def _status_file(job_id):
+    return os.path.join(_job_dir(job_id), 'job.json')
+
+
+def _write_status(job):
+    # atomar ersetzen, damit Leser nie eine halb geschriebene job.json sehen
+    path = _status_file(job['id'])
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.job.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _update(job, **changes):
+    with _status_lock:
+        job.update(changes)
+        _write_status(job)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, TypeError):
+        pass
+    return True
+
+
+def get_job(job_id):
+    """
+    Liefert den Status eines Jobs als dict (oder None für unbekannte/ungültige IDs).
+    Ist der Prozess, der den Job ausgeführt hat, nicht mehr da (Neustart), gilt der Job als fehlgeschlagen.
+    """
+    if not _JOB_ID.fullmatch(str(job_id)):
+        return None
+    try:
+        with open(_status_file(job_id), encoding='utf-8') as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if job.get('status') in ('queued', 'running') and not _pid_alive(job.get('pid')):
+        job['status'] = 'failed'
+        job['error'] = 'export was interrupted (server restarted)'
+    return job
+
+
+def archive_path(job):
+    # Pfad des fertigen Archivs (nur sinnvoll bei status == 'done')
+    return os.path.join(_job_dir(job['id']), job['filename'])
+
+
+def _cleanup_old_jobs():
+    # löscht Job-Verzeichnisse, die älter als ACCOUNTS_EXPORT_KEEP_SECONDS (Standard 1 Tag) sind
+    keep = getattr(settings, 'ACCOUNTS_EXPORT_KEEP_SECONDS', 24 * 3600)
+    try:
+        names = os.listdir(EXPORT_DIR)
+    except FileNotFoundError:
+        return
+    now = time.time()
+    for name in names:
+        job = get_job(name)
+        if job is None or job.get('status') in ('queued', 'running'):
+            continue
+        if now - job.get('created', now) > keep:
+            shutil.rmtree(_job_dir(name), ignore_errors=True)
+
+
+def start_job(requested_by, fmt='ndjson', layout='per_user'):
+    """
+    Legt einen Export-Job an und übergibt ihn dem Thread-Pool. Rückgabe: Status-dict des Jobs.
+    ValueError bei unbekanntem Format/Layout.
+    """
+    if fmt not in FORMATS or layout not in LAYOUTS:
+        raise ValueError('unknown format or layout')
+    if layout == 'combined' and fmt not in COMBINED_FORMATS:
+        raise ValueError('combined exports are only available as json or ndjson')
+    _cleanup_old_jobs()
+    job_id = uuid.uuid4().hex
+    os.makedirs(_job_dir(job_id))
+    job = {
+        'id': job_id,
+        'requested_by': requested_by,
+        'format': fmt,
+        'layout': layout,
+        'status': 'queued',
+        'created': time.time(),
+        'finished': None,
+        'pid': os.getpid(),
+        'users_total': 0,
+        'users_done': 0,
+        'reports': 0,
+        'filename': f'reports_{layout}_{time.strftime("%Y%m%d_%H%M%S")}.zip',
+        'error': None,
+    }
+    _write_status(job)
+    _pool().submit(_run, job)
+    return dict(job)
+
+
+def _write_member(zf, name, chunks):
+    # schreibt die Blöcke eines Serializers direkt in einen ZIP-Eintrag (ohne ihn im Speicher aufzubauen)
+    with zf.open(name, 'w', force_zip64=True) as member:
+        for chunk in chunks:
+            member.write(chunk.encode('utf-8'))
+
+
+def _member_name(username, used):
+    # Dateiname im ZIP: / und \ werden ersetzt. Damit z.B. 'a/b' und 'a_b' (oder 'Alice' und 'alice' beim
+    # Entpacken unter Windows/macOS) nicht denselben Eintrag bekommen, hängt bei geändertem oder schon
+    # vergebenem Namen ein kurzer Hash des echten Nutzernamens an
+    name = username.replace('/', '_').replace('\\', '_')
+    if name != username or name.casefold() in used:
+        name = f'{name}_{hashlib.sha256(username.encode("utf-8")).hexdigest()[:8]}'
+    base, n = name, 1
+    while name.casefold() in used:
+        n += 1
+        name = f'{base}_{n}'
+    used.add(name.casefold())
+    return name
+
+
+def _counted(reports, counter):
+    for r in reports:
+        counter[0] += 1
+        yield r
+
+
+def _run(job):
+    tmp = os.path.join(_job_dir(job['id']), '.archive.tmp')
+    try:
+        usernames = [u.get('username') for u in storage.load_users() if u.get('username')]
+        _update(job, status='running', users_total=len(usernames))
+        serialize, _content_type, extension = exports.FORMATS[job['format']]
+        counter = [0]
+        with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            if job['layout'] == 'per_user':
+                used = set()
+                for done, username in enumerate(usernames, 1):
+                    reports = _counted(storage.iter_reports_for_user(username), counter)
+                    name = _member_name(username, used)  # Nutzername als Dateiname
+                    _write_member(zf, f'{name}.{extension}', serialize(reports))
+                    _update(job, users_done=done, reports=counter[0])
+            else:
+                def all_reports():
+                    for done, username in enumerate(usernames, 1):
+                        yield from _counted(storage.iter_reports_for_user(username), counter)
+                        _update(job, users_done=done, reports=counter[0])
+                _write_member(zf, f'all_reports.{extension}', serialize(all_reports()))
+        os.replace(tmp, archive_path(job))
+        _update(job, status='done', finished=time.time(), reports=counter[0])
+    except Exception as exc:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        _update(job, status='failed', finished=time.time(), error=str(exc))
+    finally:
+        connections.close_all()  # DB-Verbindungen dieses Pool-Threads schließen (SQLite-Backend)
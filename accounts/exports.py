@@ -0,0 +1,113 @@
+"""
+Generator-basierte Serializer für export_reports (StreamingHttpResponse).
+
+Jeder Serializer nimmt einen Iterator über Report-dicts (z.B. storage.iter_reports_for_user)
+und liefert die Ausgabe stückweise als str, Zeilen werden zu Blöcken zusammengefasst.
+So bleibt der Speicherbedarf pro Worker unabhängig von der Anzahl exportierter Reports.
+"""
+import csv
+import json
+import zlib
+from xml.sax.saxutils import escape
+
+# Anzahl Reports, die zu einem Block zusammengefasst werden (weniger, aber größere Writes)
+CHUNK_REPORTS = 500
+
+CSV_HEADER = ['date', 'minutes', 'module', 'content']
+
+# Kompressionsstufe für die .gz-Formate (6 = zlib-Standard, guter Kompromiss aus Größe und CPU)
+GZIP_LEVEL = 6
+
+
+def _chunked(parts):
+    # fasst viele kleine Strings zu Blöcken zusammen
+    buf = []
+    for part in parts:
+        buf.append(part)
+        if len(buf) >= CHUNK_REPORTS:
+            yield ''.join(buf)
+            buf = []
+    if buf:
+        yield ''.join(buf)
+
+
+def iter_json(reports):
+    # gleiche Ausgabe wie json.dumps(reports, ensure_ascii=False, indent=2), aber Report für Report
+    def parts():
+        first = True
+        for r in reports:
+            item = json.dumps(r, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            yield ('[\n  ' if first else ',\n  ') + item
+            first = False
+        yield '[]' if first else '\n]'
+    return _chunked(parts())
+
+
+def iter_ndjson(reports):
+    # ein Report pro Zeile, ohne Einrückung/Leerzeichen (für Weiterverarbeitung Zeile für Zeile)
+    def parts():
+        for r in reports:
+            yield json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n'
+    return _chunked(parts())
+
+
+class _Echo:
+    # "Datei" für csv.writer, die die geschriebene Zeile einfach zurückgibt
+    def write(self, value):
+        return value
+
+
+def iter_csv(reports):
+    def parts():
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_HEADER)  # header
+        for r in reports:
+            yield writer.writerow([r.get('date', ''), r.get('minutes', 0), r.get('module', ''), r.get('content', '')])
+    return _chunked(parts())
+
+
+def iter_xml(reports):
+    # gleiche Struktur wie bisher mit ElementTree: <reports><report><date/>...</report></reports>
+    def parts():
+        yield "<?xml version='1.0' encoding='utf-8'?>\n<reports>"
+        for r in reports:
+            yield (
+                '<report>'
+                f"<date>{escape(str(r.get('date', '')))}</date>"
+                f"<minutes>{escape(str(r.get('minutes', 0)))}</minutes>"
+                f"<module>{escape(r.get('module', '') or '')}</module>"
+                f"<content>{escape(r.get('content', '') or '')}</content>"
+                '</report>'
+            )
+        yield '</reports>'
+    return _chunked(parts())
+
+
+def gzipped(chunks):
+    """
+    Komprimiert die Blöcke eines Serializers fortlaufend zu einer gzip-Datei (bytes).
+    Es wird nie die ganze Ausgabe gepuffert; leere Zwischenergebnisse von zlib werden nicht gesendet.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16+: gzip-Header/Trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _gz(serialize):
+    return lambda reports: gzipped(serialize(reports))
+
+
+# Format -> (Serializer, Content-Type, Dateiendung)
+# Die .gz-Formate sind komprimierte Dateien (application/gzip), kein Content-Encoding der Antwort
+FORMATS = {
+    'json': (iter_json, 'application/json; charset=utf-8', 'json'),
+    'csv': (iter_csv, 'text/csv; charset=utf-8', 'csv'),
+    'xml': (iter_xml, 'application/xml; charset=utf-8', 'xml'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson; charset=utf-8', 'ndjson'),
+    'json.gz': (_gz(iter_json), 'application/gzip', 'json.gz'),
+    'csv.gz': (_gz(iter_csv), 'application/gzip', 'csv.gz'),
+    'ndjson.gz': (_gz(iter_ndjson), 'application/gzip', 'ndjson.gz'),
+}
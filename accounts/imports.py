@@ -0,0 +1,95 @@
+"""
+Streaming-Import für upload_reports.
+
+Die hochgeladene Datei wird blockweise (uploaded.chunks()) dekodiert und Zeile für Zeile
+geparst und validiert; es wird nie die ganze Datei als String oder Liste im Speicher gehalten.
+Jede Zeile wird mit demselben WorkReportForm geprüft wie beim Anlegen über die Webseite.
+"""
+import codecs
+import csv
+
+from .forms import WorkReportForm
+
+REQUIRED_HEADERS = ('date', 'minutes', 'module', 'content')
+
+# Import-Modi für upload_reports: alles ersetzen, anhängen, anhängen ohne Duplikate (datum+modul+text)
+MODES = ('overwrite', 'append', 'merge')
+
+# so viele Fehlermeldungen werden höchstens gesammelt/angezeigt (gezählt werden alle)
+MAX_REPORTED_ERRORS = 20
+
+
+def _iter_lines(chunks):
+    # dekodiert Byte-Blöcke inkrementell (UTF-8, optional mit BOM) und liefert einzelne Zeilen inkl. '\n'
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_rows(chunks):
+    """
+    Liefert pro Datenzeile (zeilennummer, report, fehler):
+    - report: {'date', 'minutes', 'module', 'content'} oder None, wenn die Zeile ungültig ist
+    - fehler: Text der Fehlermeldung oder None
+    Fehlende Spalten im Header ergeben einen einzigen Fehler mit Zeilennummer 1.
+    Nicht dekodierbare Bytes / kaputtes CSV beenden den Import mit einem Fehler für die aktuelle Zeile.
+    """
+    reader = csv.reader(_iter_lines(chunks))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return  # leere Datei -> keine Reports
+        columns = {name.strip().lower(): idx for idx, name in enumerate(header)}  # Header case-insensitive
+        missing = [name for name in REQUIRED_HEADERS if name not in columns]
+        if missing:
+            yield 1, None, 'missing columns: ' + ', '.join(missing) + ' (expected: date,minutes,module,content)'
+            return
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue  # leere Zeilen überspringen
+            data = {name: (row[columns[name]] if columns[name] < len(row) else '') for name in REQUIRED_HEADERS}
+            form = WorkReportForm(data)
+            if form.is_valid():
+                yield reader.line_num, {
+                    'date': str(form.cleaned_data['date']),  # normalisiert auf YYYY-MM-DD
+                    'minutes': form.cleaned_data['minutes'],
+                    'module': form.cleaned_data['module'],
+                    'content': form.cleaned_data['content'],
+                }, None
+            else:
+                message = '; '.join(f'{field}: {msg}' for field, msgs in form.errors.items() for msg in msgs)
+                yield reader.line_num, None, message
+    except UnicodeDecodeError:
+        yield reader.line_num + 1, None, 'file is not valid UTF-8'
+    except csv.Error as exc:
+        yield reader.line_num, None, f'invalid CSV: {exc}'
+
+
+def validate(chunks):
+    """
+    Erster Durchlauf: prüft alle Zeilen. Rückgabe (anzahl gültiger zeilen, fehleranzahl, [meldungen])
+    mit höchstens MAX_REPORTED_ERRORS Meldungen der Form 'line 3: minutes: ...'.
+    """
+    valid, error_count, messages = 0, 0, []
+    for line_no, report, error in iter_rows(chunks):
+        if error is None:
+            valid += 1
+            continue
+        error_count += 1
+        if len(messages) < MAX_REPORTED_ERRORS:
+            messages.append(f'line {line_no}: {error}')
+    return valid, error_count, messages
+
+
+def iter_reports(chunks):
+    # zweiter Durchlauf (nach validate): nur die gültigen Reports, direkt an den Storage durchgereicht
+    for _line_no, report, _error in iter_rows(chunks):
+        if report is not None:
+            yield report
@@ -0,0 +1,112 @@
+"""
+Append-only Journal (JSON-Lines) für work_reports.json.
+
+Aufbau der Datei:
+  1. Zeile:   {"op": "base", "crc": <crc32 des Snapshots>}
+  danach:     eine Zeile pro Änderung, z.B. {"op": "add", "report": {...}}
+
+Der Snapshot ist work_reports.json selbst. Ein Journal gilt nur, solange die CRC im
+Header zum aktuellen Snapshot passt: nach einer Kompaktierung (neuer Snapshot) ist ein
+altes Journal automatisch veraltet, auch wenn der Prozess zwischen dem Schreiben des
+Snapshots und dem Anlegen des neuen Journals abstürzt.
+Was die einzelnen Einträge bedeuten, entscheidet storage.py (hier wird nur gelesen/geschrieben).
+"""
+import json
+import os
+import zlib
+
+
+def crc(data_bytes):
+    # Prüfsumme des Snapshots (so wie er auf der Platte liegt)
+    return zlib.crc32(data_bytes) & 0xffffffff
+
+
+def start(path, snapshot_crc):
+    """
+    Legt ein neues, leeres Journal für den Snapshot mit snapshot_crc an (atomar per os.replace).
+    Gibt den Offset hinter dem Header zurück.
+    """
+    header = (json.dumps({'op': 'base', 'crc': snapshot_crc}) + '\n').encode('utf-8')
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(header)
+
+
+def append(path, record):
+    """
+    Hängt einen Eintrag an (nur unter der Schreibsperre von storage.py aufrufen) und wartet per fsync,
+    bis er auf der Platte ist. Schlägt das Schreiben fehl (z.B. Platte voll), wird die Datei auf die
+    alte Größe gekürzt: keine halbe Zeile, an die der nächste Eintrag angehängt würde.
+    Gibt die neue Dateigröße zurück.
+    """
+    line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+    fd = os.open(path, os.O_RDWR | os.O_APPEND)
+    try:
+        size = os.fstat(fd).st_size
+        if not _ends_with_newline(fd, size):
+            line = b'\n' + line  # halbe Zeile eines abgestürzten Schreibers abschließen (read() überspringt sie)
+        try:
+            written = 0
+            while written < len(line):
+                written += os.write(fd, line[written:])  # write() darf weniger schreiben als verlangt
+            os.fsync(fd)
+        except BaseException:
+            try:
+                os.ftruncate(fd, size)
+            except OSError:
+                pass  # ursprünglicher Fehler ist wichtiger; read() ignoriert eine halbe letzte Zeile
+            raise
+        return size + len(line)
+    finally:
+        os.close(fd)
+
+
+def _ends_with_newline(fd, size):
+    # True bei leerer Datei oder wenn das letzte Byte ein Zeilenende ist (Schreibposition ist wegen O_APPEND egal)
+    if not size:
+        return True
+    os.lseek(fd, size - 1, os.SEEK_SET)
+    return os.read(fd, 1) == b'\n'
+
+
+def read(path, snapshot_crc, offset=0):
+    """
+    Liest alle Einträge ab offset.
+    Rückgabe (records, neuer_offset) oder (None, 0), wenn das Journal fehlt oder nicht zum Snapshot gehört.
+    Eine unvollständige letzte Zeile (Absturz beim Schreiben) wird nicht gelesen und beim nächsten Mal erneut versucht.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None, 0
+    with f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None, 0
+        if not isinstance(header, dict) or header.get('op') != 'base' or header.get('crc') != snapshot_crc:
+            return None, 0  # veraltetes Journal (gehört zu einem älteren Snapshot)
+        offset = max(offset, f.tell())  # nie den Header als Eintrag lesen
+        f.seek(offset)
+        records = []
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # halbe Zeile -> noch nicht fertig geschrieben
+            offset += len(line)
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass  # kaputte Zeile überspringen
+    return records, offset
+
+
+def remove(path):
+    # löscht das Journal (z.B. nach dem Wechsel zurück auf das JSON-Backend)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
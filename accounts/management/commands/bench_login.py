@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from accounts.management.commands.benchmark import _SETTINGS_TEMPLATE
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+class Command(BaseCommand):
+    help = ('Misst Logins unter Last: viele gleichzeitige POSTs auf die async login_view (Nutzer nachschlagen, '
+            'Passwort prüfen, Cookie setzen) mit vielen verschiedenen Nutzern, einmal mit kaltem Cache '
+            '(accounts.json und Passwort-Cache leer, jeder Nutzer einmal) und einmal warm. Ausgabe: Latenz '
+            'p50/p95/p99 und Logins pro Sekunde. Läuft in einem eigenen Prozess mit Temp-Verzeichnis '
+            '(die echten Daten werden nicht angefasst).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Anzahl Nutzer mit eigenem Passwort (Standard 100)')
+        parser.add_argument('--requests', type=int, default=200, help='Logins im warmen Durchlauf (Standard 200)')
+        parser.add_argument('--concurrency', type=int, default=32, help='gleichzeitige Logins (Standard 32)')
+        parser.add_argument('--iterations', type=int, default=None,
+                            help='PBKDF2-Iterationen (Standard: ACCOUNTS_PASSWORD_ITERATIONS)')
+        parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+        # intern: der eigentliche Lauf im Unterprozess
+        parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+        parser.add_argument('--output', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self._worker(options)
+            return
+        results = self._spawn(options)
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for r in results:
+            self.stdout.write(
+                f"{r['mode']:>5}: {r['requests']} Logins ({r['users']} Nutzer), {r['concurrency']} gleichzeitig, "
+                f"{r['per_second']:.1f}/s, p50 {r['p50_ms']:.1f} ms, p95 {r['p95_ms']:.1f} ms, p99 {r['p99_ms']:.1f} ms")
+
+    def _spawn(self, options):
+        # wie benchmark: eigener Prozess mit Settings, die auf ein Temp-Verzeichnis zeigen
+        with tempfile.TemporaryDirectory(prefix='accounts-bench-login-') as tmp:
+            data_dir = os.path.join(tmp, 'data')
+            os.makedirs(data_dir)
+            with open(os.path.join(tmp, '_bench_settings.py'), 'w', encoding='utf-8') as f:
+                f.write(_SETTINGS_TEMPLATE.format(settings_module=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                                                  data_dir=data_dir))
+            out = os.path.join(tmp, 'result.json')
+            env = dict(os.environ, DJANGO_SETTINGS_MODULE='_bench_settings')
+            env['PYTHONPATH'] = os.pathsep.join([tmp] + [p for p in sys.path if p])
+            cmd = [sys.executable, '-m', 'django', 'bench_login', '--worker', '--output', out,
+                   '--users', str(options['users']), '--requests', str(options['requests']),
+                   '--concurrency', str(options['concurrency'])]
+            if options['iterations']:
+                cmd += ['--iterations', str(options['iterations'])]
+            proc = subprocess.run(cmd, env=env)
+            if proc.returncode != 0:
+                raise CommandError(f'Login-Benchmark fehlgeschlagen (Exit-Code {proc.returncode})')
+            with open(out, encoding='utf-8') as f:
+                return json.load(f)
+
+    def _worker(self, options):
+        from accounts import passwords, storage
+
+        overrides = {'ACCOUNTS_PASSWORD_CACHE_SECONDS': 300}  # Template schaltet den Cache ab; hier kalt vs. warm
+        if options['iterations']:
+            overrides['ACCOUNTS_PASSWORD_ITERATIONS'] = options['iterations']
+        users = [(f'bench{i:05d}', f'pw-{i}-{os.urandom(4).hex()}') for i in range(max(options['users'], 1))]
+        with override_settings(**overrides):
+            # jeder Nutzer mit eigenem Passwort (Hashen parallel, nicht Teil der Messung)
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 2) as pool:
+                hashes = list(pool.map(passwords.hash_password, (pw for _name, pw in users)))
+            storage.save_users([{'username': name, 'email': f'{name}@example.com', 'password': stored,
+                                 'role': 'user', 'upgrade_requested': False}
+                                for (name, _pw), stored in zip(users, hashes)])
+            results = []
+            # kalt: accounts.json nicht im Cache, kein Passwort gemerkt -> jeder Login prüft voll
+            storage.clear_cache()
+            with passwords._cache_lock:
+                passwords._cache.clear()
+            results.append(dict(asyncio.run(self._run(users, options['concurrency'])), mode='kalt'))
+            # warm: dieselben Nutzer erneut (Nutzer im Cache, Passwort-Prüfung gemerkt)
+            warm = [users[i % len(users)] for i in range(max(options['requests'], 1))]
+            results.append(dict(asyncio.run(self._run(warm, options['concurrency'])), mode='warm'))
+        for r in results:
+            r['users'] = len(users)
+            r['iterations'] = overrides.get('ACCOUNTS_PASSWORD_ITERATIONS', settings.ACCOUNTS_PASSWORD_ITERATIONS)
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    async def _run(self, logins, concurrency):
+        from django.test import AsyncClient
+
+        limit = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def login(username, password):
+            async with limit:
+                client = AsyncClient()  # eigener Client pro Login (keine geteilten Cookies)
+                start = time.perf_counter()
+                resp = await client.post('/login/', {'username': username, 'password': password})
+                latencies.append(time.perf_counter() - start)
+                if resp.status_code != 302:
+                    raise CommandError(f'Login für {username} fehlgeschlagen (Status {resp.status_code})')
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login(name, pw) for name, pw in logins))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'requests': len(logins),
+            'concurrency': concurrency,
+            'per_second': len(logins) / elapsed if elapsed else 0.0,
+            'p50_ms': _percentile(latencies, 50) * 1000,
+            'p95_ms': _percentile(latencies, 95) * 1000,
+            'p99_ms': _percentile(latencies, 99) * 1000,
+        }
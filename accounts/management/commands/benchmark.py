@@ -0,0 +1,206 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BENCH_PASSWORD = 'bench-password'
+MODULES = ('Mathe', 'Physik', 'Informatik', 'Englisch', 'Projekt')
+
+# eigene Settings pro Lauf: alle Daten (JSON-Dateien, SQLite-Datenbank) liegen im Temp-Verzeichnis
+_SETTINGS_TEMPLATE = '''from {settings_module} import *  # noqa: F401,F403
+from pathlib import Path
+
+BASE_DIR = Path({data_dir!r})
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(BASE_DIR / 'db.sqlite3')}}}}
+ACCOUNTS_SQLITE_DATABASE = 'default'
+ACCOUNTS_PASSWORD_CACHE_SECONDS = 0  # jede Passwort-Prüfung kostet den vollen PBKDF2-Aufwand
+ALLOWED_HOSTS = ['testserver']
+'''
+
+
+def _summary(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        'repeat': len(ms),
+        'min_ms': round(ms[0], 3),
+        'median_ms': round(statistics.median(ms), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p95_ms': round(ms[min(len(ms) - 1, round(0.95 * len(ms)) - 1)], 3),
+        'max_ms': round(ms[-1], 3),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Benchmark für accounts.storage und die wichtigsten Views mit synthetischen Daten in '
+            'mehreren Größen. Jede Größe läuft in einem eigenen Prozess mit eigenem Temp-Verzeichnis '
+            '(die echten Daten werden nicht angefasst). Ergebnis als JSON-Datei (--output).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,100000,1000000',
+                            help='Anzahl Reports je Lauf, kommagetrennt (Standard 1000,100000,1000000)')
+        parser.add_argument('--reports-per-user', type=int, default=100,
+                            help='Reports pro synthetischem Nutzer (Standard 100)')
+        parser.add_argument('--repeat', type=int, default=5, help='Messungen pro Operation (Standard 5)')
+        parser.add_argument('--output', default='bench_results.json', help='Ergebnisdatei (JSON)')
+        # intern: ein einzelner Lauf im Unterprozess
+        parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+        parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self._worker(options)
+            return
+        try:
+            scales = [int(s) for s in options['scales'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--scales erwartet Zahlen, z.B. 1000,100000')
+        runs = []
+        for scale in scales:
+            self.stdout.write(f'Größe {scale} Reports ...')
+            runs.append(self._spawn(scale, options))
+        result = {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'storage_backend': getattr(settings, 'ACCOUNTS_STORAGE_BACKEND', 'json'),
+            'reports_backend': getattr(settings, 'ACCOUNTS_REPORTS_BACKEND', 'json'),
+            'password_iterations': getattr(settings, 'ACCOUNTS_PASSWORD_ITERATIONS', None),
+            'repeat': options['repeat'],
+            'runs': runs,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        for run in runs:
+            self.stdout.write(f"\n{run['reports']} Reports, {run['users']} Nutzer, Datei {run['data_bytes']} Bytes")
+            for name, stats in run['operations'].items():
+                self.stdout.write(f"  {name:<28} median {stats['median_ms']:>10.2f} ms   p95 {stats['p95_ms']:>10.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"\nErgebnis gespeichert: {options['output']}"))
+
+    def _spawn(self, scale, options):
+        # startet den Lauf für eine Größe als eigenen Prozess mit Settings, die auf ein Temp-Verzeichnis zeigen
+        with tempfile.TemporaryDirectory(prefix='accounts-bench-') as tmp:
+            data_dir = os.path.join(tmp, 'data')
+            os.makedirs(data_dir)
+            with open(os.path.join(tmp, '_bench_settings.py'), 'w', encoding='utf-8') as f:
+                f.write(_SETTINGS_TEMPLATE.format(settings_module=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                                                  data_dir=data_dir))
+            out = os.path.join(tmp, 'result.json')
+            env = dict(os.environ, DJANGO_SETTINGS_MODULE='_bench_settings')
+            env['PYTHONPATH'] = os.pathsep.join([tmp] + [p for p in sys.path if p])  # gleiche Importpfade wie dieser Prozess
+            cmd = [sys.executable, '-m', 'django', 'benchmark', '--worker', '--scale', str(scale),
+                   '--reports-per-user', str(options['reports_per_user']), '--repeat', str(options['repeat']),
+                   '--output', out]
+            proc = subprocess.run(cmd, env=env)
+            if proc.returncode != 0:
+                raise CommandError(f'Benchmark für {scale} Reports fehlgeschlagen (Exit-Code {proc.returncode})')
+            with open(out, encoding='utf-8') as f:
+                return json.load(f)
+
+    def _worker(self, options):
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+
+        from accounts import passwords, storage
+
+        setup_test_environment()
+        scale, per_user, repeat = options['scale'], max(options['reports_per_user'], 1), options['repeat']
+        users_count = max(scale // per_user, 1)
+        usernames = [f'bench{i:07d}' for i in range(users_count)]
+        operations = {}
+
+        def measure(name, run, setup=None):
+            samples = []
+            for _ in range(repeat):
+                arg = setup() if setup else None
+                start = time.perf_counter()
+                run(arg) if setup else run()
+                samples.append(time.perf_counter() - start)
+            operations[name] = _summary(samples)
+
+        # synthetische Daten in einem Rutsch schreiben (nicht Teil der Messung)
+        start = time.perf_counter()
+        stored = passwords.hash_password(BENCH_PASSWORD)
+        storage.save_users([{'username': name, 'email': f'{name}@example.com', 'password': stored,
+                             'role': 'vip', 'upgrade_requested': False} for name in usernames])
+        day = datetime.date(2026, 1, 1)
+        storage.save_reports([{
+            'id': f'{i:032x}',
+            'username': usernames[i % users_count],
+            'minutes': 15 + i % 240,
+            'date': (day + datetime.timedelta(days=i % 365)).isoformat(),
+            'module': MODULES[i % len(MODULES)],
+            'content': f'Synthetischer Bericht {i}',
+        } for i in range(scale)])
+        setup_seconds = time.perf_counter() - start
+
+        user = usernames[0]
+        counter = iter(range(10 ** 9))
+
+        # Storage
+        def cold_load():
+            storage.clear_cache()
+            storage.load_reports()
+        measure('load_reports (cold)', cold_load)
+        measure('add_report', lambda: storage.add_report(user, 30, '2026-06-01', 'Mathe', f'neu {next(counter)}'))
+        measure('get_reports_for_user', lambda: storage.get_reports_for_user(user))
+        measure('summarize_reports', lambda: storage.summarize_reports(user))
+
+        def add_one():
+            content = f'zu löschen {next(counter)}'
+            storage.add_report(user, 10, '2026-06-02', 'Physik', content)
+            return content
+        measure('delete_reports', lambda content: storage.delete_reports(user, 10, '2026-06-02', 'Physik', content),
+                setup=add_one)
+        replacement = [{'minutes': 20, 'date': '2026-06-03', 'module': 'Projekt', 'content': f'ersetzt {i}'}
+                       for i in range(per_user)]
+        measure('overwrite_user_reports',
+                lambda: storage.overwrite_user_reports(user, [dict(r) for r in replacement]))
+        measure('authenticate', lambda: storage.authenticate(user, BENCH_PASSWORD))
+
+        # Views über den Test-Client (inkl. Middleware, Templates, Streaming)
+        client = Client()
+        client.post('/login/', {'username': user, 'password': BENCH_PASSWORD})
+
+        def expect(resp, status):
+            if resp.status_code != status:
+                raise CommandError(f'{resp.request["PATH_INFO"]}: HTTP {resp.status_code} statt {status}')
+            return resp
+        measure('view home', lambda: expect(client.get('/'), 200))
+
+        def export():
+            resp = expect(client.get('/reports/export/?format=csv'), 200)
+            for _chunk in resp.streaming_content:
+                pass
+        measure('view export_reports (csv)', export)
+        upload = ('date,minutes,module,content\n' + ''.join(
+            f'2026-06-04,25,Englisch,upload {i}\n' for i in range(per_user))).encode('utf-8')
+
+        def upload_csv():
+            from django.core.files.uploadedfile import SimpleUploadedFile
+            expect(client.post('/reports/upload/', {'csv_file': SimpleUploadedFile('bench.csv', upload),
+                                                    'mode': 'overwrite'}), 302)
+        measure('view upload_reports', upload_csv)
+
+        # Größe aller Datendateien (JSON, Journal bzw. SQLite-Datenbank)
+        data_bytes = sum(os.path.getsize(os.path.join(settings.BASE_DIR, name)) for name in os.listdir(settings.BASE_DIR)
+                         if os.path.isfile(os.path.join(settings.BASE_DIR, name)))
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump({
+                'reports': scale,
+                'users': users_count,
+                'reports_per_user': per_user,
+                'data_bytes': data_bytes,
+                'setup_seconds': round(setup_seconds, 3),
+                'operations': operations,
+            }, f, indent=2)
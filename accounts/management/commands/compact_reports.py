@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from accounts import storage
+
+
+class Command(BaseCommand):
+    help = ('Faltet das Report-Journal (work_reports.journal.jsonl) in einen neuen Snapshot work_reports.json; '
+            'im Layout "sharded" für jeden Shard.')
+
+    def handle(self, *args, **options):
+        count = storage.compact_reports()
+        self.stdout.write(self.style.SUCCESS(f'Snapshot geschrieben: {count} Reports'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import sqlite_storage, storage
+
+
+class Command(BaseCommand):
+    help = 'Importiert accounts.json und work_reports.json bzw. die Shards (inkl. Journal) einmalig in die SQLite-Tabellen.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='vorhandene Zeilen in den SQLite-Tabellen überschreiben')
+
+    def handle(self, *args, **options):
+        counts = sqlite_storage.table_counts()
+        if (counts['users'] or counts['reports']) and not options['force']:
+            raise CommandError(
+                f"SQLite-Tabellen enthalten bereits Daten ({counts['users']} Nutzer, "
+                f"{counts['reports']} Reports); mit --force überschreiben.")
+        # direkt aus den Dateien lesen, unabhängig davon, welches Backend gerade aktiv ist
+        users = storage._read_json_list(storage._DATA_FILE)
+        reports = storage._iter_json_reports()  # work_reports.json bzw. alle Shards, Shard für Shard
+        sqlite_storage.import_json(users, reports)
+        counts = sqlite_storage.table_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Importiert: {counts['users']} Nutzer, {counts['reports']} Reports"))
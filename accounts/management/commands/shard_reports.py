@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import storage
+
+
+class Command(BaseCommand):
+    help = ('Verteilt work_reports.json auf Shard-Dateien in work_reports/ (Layout "sharded") bzw. mit --merge '
+            'zurück in eine Datei. Vorher den Server stoppen.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', type=int, default=getattr(settings, 'ACCOUNTS_REPORTS_SHARDS', 64),
+                            help='Anzahl Shards (Standard: ACCOUNTS_REPORTS_SHARDS)')
+        parser.add_argument('--force', action='store_true',
+                            help='vorhandenes work_reports/ ersetzen (wird als work_reports.old-<zeit> aufgehoben)')
+        parser.add_argument('--merge', action='store_true',
+                            help='alle Shards wieder in work_reports.json schreiben (Layout "single")')
+
+    def handle(self, *args, **options):
+        if getattr(settings, 'ACCOUNTS_STORAGE_BACKEND', 'json') == 'sqlite':
+            raise CommandError('Nur für das JSON-Backend (ACCOUNTS_STORAGE_BACKEND = "json").')
+        if options['merge']:
+            count = storage.merge_report_shards()
+            self.stdout.write(self.style.SUCCESS(
+                f'{count} Reports nach work_reports.json geschrieben; ACCOUNTS_REPORTS_LAYOUT = "single" setzen.'))
+            return
+        try:
+            count = storage.split_reports_into_shards(options['shards'], force=options['force'])
+        except ValueError as exc:
+            raise CommandError(f'{exc} (mit --force ersetzen)' if 'exists' in str(exc) else str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} Reports auf {options["shards"]} Shards verteilt; ACCOUNTS_REPORTS_LAYOUT = "sharded" setzen '
+            '(work_reports.json bleibt als Backup liegen).'))
@@ -0,0 +1,155 @@
+"""
+Zeitmessung pro Request (Server-Timing) und Histogramme im Prozess.
+
+Während eines Requests sammelt ein Kontext (contextvars, funktioniert auch in async Views)
+die Zeiten der einzelnen Phasen, z.B.:
+  cookie         Login-Cookie prüfen + Rolle nachschlagen (accounts/middleware.py)
+  storage_read   Datei lesen (Bytes), storage_parse: JSON parsen, storage_index: Tabelle/Index bauen
+  storage_write  Datei schreiben bzw. Journal-Zeile anhängen (Bytes), lock_wait: Warten auf die Sperre
+  db             SQL-Abfragen (SQLite-Backend)
+  view           View inkl. render, render: nur das Template
+Außerhalb eines Requests (Management-Commands, Hintergrund-Threads) ist record() ein No-op.
+
+Nach dem Request wird die Summe jeder Phase in ein Histogramm übernommen (snapshot() liefert alles
+als dict für den Metrik-Endpoint /metrics/). Die Werte gelten nur für diesen Prozess.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# obere Grenzen der Histogramm-Buckets in Millisekunden (dazu ein Bucket "darüber")
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current = contextvars.ContextVar('accounts_request_timings', default=None)
+
+_lock = threading.Lock()  # schützt _phases, _routes und _started
+_phases = {}  # phase -> _Histogram (Summe der Phase pro Request)
+_routes = {}  # url_name -> _Histogram (Gesamtdauer pro Request)
+_started = time.time()
+
+
+class _Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max', 'bytes')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+
+    def add(self, seconds, nbytes=0):
+        ms = seconds * 1000
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.bytes += nbytes
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+            'bytes': self.bytes,
+            'buckets': self.counts[:],
+        }
+
+
+class RequestTimings:
+    # Phasen eines Requests: name -> [sekunden, anzahl, bytes] (Reihenfolge = erstes Auftreten).
+    # Ein Request kann aus mehreren Threads des Storage-Pools messen (asyncio.gather) -> Sperre
+
+    def __init__(self):
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds, nbytes=0):
+        with self._lock:
+            entry = self.phases.get(phase)
+            if entry is None:
+                self.phases[phase] = [seconds, 1, nbytes]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+                entry[2] += nbytes
+
+    def items(self):
+        # Kopie der Phasen als [(name, (sekunden, anzahl, bytes))] (auch während noch gemessen wird)
+        with self._lock:
+            return [(phase, tuple(entry)) for phase, entry in self.phases.items()]
+
+    def server_timing(self, total=None):
+        # Wert für den Server-Timing-Header, z.B. 'storage_read;dur=3.2;desc="2x 81234 B", total;dur=12.5'
+        parts = []
+        for phase, (seconds, count, nbytes) in self.items():
+            desc = f'{count}x'
+            if nbytes:
+                desc += f' {nbytes} B'
+            parts.append(f'{phase};dur={seconds * 1000:.3f};desc="{desc}"')
+        if total is not None:
+            parts.append(f'total;dur={total * 1000:.3f}')
+        return ', '.join(parts)
+
+
+def start():
+    # beginnt die Messung für den aktuellen Request; Rückgabe (token, timings) -> finish(token, ...)
+    timings = RequestTimings()
+    return _current.set(timings), timings
+
+
+def finish(token, timings, route, total):
+    # beendet die Messung und übernimmt die Werte in die Histogramme
+    _current.reset(token)
+    with _lock:
+        for phase, (seconds, _count, nbytes) in timings.items():
+            _phases.setdefault(phase, _Histogram()).add(seconds, nbytes)
+        _phases.setdefault('total', _Histogram()).add(total)
+        _routes.setdefault(route or '-', _Histogram()).add(total)
+
+
+def record(phase, seconds, nbytes=0):
+    # hängt eine Messung an den laufenden Request an (ohne Request: nichts tun)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, seconds, nbytes)
+
+
+def timed_query(execute, sql, params, many, context):
+    # für connection.execute_wrappers: Dauer jeder SQL-Abfrage als Phase 'db' (SQLite-Backend)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record('db', time.perf_counter() - started)
+
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+def snapshot():
+    # alle Histogramme als dict (für den Metrik-Endpoint)
+    with _lock:
+        return {
+            'since': _started,
+            'buckets_ms': list(BUCKETS_MS) + ['+Inf'],
+            'phases': {name: h.as_dict() for name, h in sorted(_phases.items())},
+            'routes': {name: h.as_dict() for name, h in sorted(_routes.items())},
+        }
+
+
+def reset():
+    global _started
+    with _lock:
+        _phases.clear()
+        _routes.clear()
+        _started = time.time()
@@ -0,0 +1,253 @@
+"""
+Middleware für das signierte Login-Cookie (acct_user).
+
+Das Cookie wird pro Request genau einmal dekodiert und als request.account_user abgelegt
+(views._read_user_from_cookie liest nur noch dieses Attribut). Zwei Caches im Prozess:
+
+- bereits geprüfte Cookie-Strings -> Inhalt (spart HMAC + Dekomprimieren + JSON); der Ablauf
+  (max_age) wird weiter über den Zeitstempel im Cookie erzwungen
+- username -> (version, role, upgrade_requested): Rolle und Upgrade-Status kommen aus dem
+  Storage statt aus dem Cookie, damit z.B. accept_upgrade/change_role sofort wirken. Neu
+  nachgeschlagen wird nur, wenn sich storage.users_version() geändert hat.
+
+Dazu TimingMiddleware: misst jeden Request in Phasen (accounts/metrics.py), schickt sie als
+Server-Timing-Header mit und kann langsame Requests stichprobenartig mit cProfile aufzeichnen.
+"""
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.signing import BadSignature, SignatureExpired
+from django.db.backends.signals import connection_created
+
+from . import metrics, storage
+
+# cookie settings
+COOKIE_NAME = 'acct_user'  # Name des Cookies, das den angemeldeten Nutzer speichert
+COOKIE_SALT = 'accounts-salt'  # Salt für das Signieren des Cookie-Inhalts
+COOKIE_MAX_AGE = 60 * 60 * 24 * 7  # Lebensdauer des Cookies in Sekunden (eine Woche)
+
+_DECODED_MAX = 4096  # so viele dekodierte Cookies werden gemerkt (LRU)
+_decoded = OrderedDict()  # cookie-string -> (data, gültig bis)
+_decoded_lock = threading.Lock()
+
+_STATUS_MAX = 10000
+_status = {}  # username -> (users_version, role, upgrade_requested)
+_status_lock = threading.Lock()
+
+
+def _decode(cookie):
+    # liefert den (geprüften) Cookie-Inhalt oder None; gleiche Cookies werden nur einmal verifiziert
+    now = time.time()
+    with _decoded_lock:
+        entry = _decoded.get(cookie)
+        if entry is not None:
+            if entry[1] > now:
+                _decoded.move_to_end(cookie)
+                return entry[0]
+            del _decoded[cookie]  # abgelaufen -> wie signing.loads ablehnen
+            return None
+    try:
+        # signiertes Token entschlüsseln/prüfen; max_age schützt gegen veraltete Cookies
+        data = signing.loads(cookie, salt=COOKIE_SALT, max_age=COOKIE_MAX_AGE)
+        # Zeitstempel steht im Cookie vor der Signatur: <payload>:<zeitstempel>:<signatur>
+        signed_at = signing.b62_decode(cookie.rsplit(':', 2)[1])
+    except (BadSignature, SignatureExpired, ValueError, IndexError):
+        return None  # bei ungültiger Signatur oder abgelaufenem Token -> anonym
+    # data expected to be dict with username and email
+    if not isinstance(data, dict) or 'username' not in data:
+        return None
+    with _decoded_lock:
+        _decoded[cookie] = (data, signed_at + COOKIE_MAX_AGE)
+        if len(_decoded) > _DECODED_MAX:
+            _decoded.popitem(last=False)
+    return data
+
+
+def _current_status(username):
+    # (role, upgrade_requested) aus dem Storage, gecacht bis sich die Nutzerdaten ändern; None = unbekannt
+    version = storage.users_version()
+    with _status_lock:
+        entry = _status.get(username)
+    if entry is not None and entry[0] == version:
+        return entry[1:]
+    u = storage.find_user(username)
+    if u is None:
+        return None
+    status = (u.get('role', 'user') or 'user', bool(u.get('upgrade_requested')))
+    with _status_lock:
+        if len(_status) >= _STATUS_MAX:
+            _status.clear()
+        _status[username] = (version,) + status
+    return status
+
+
+def get_request_user(request):
+    """
+    Angemeldeter Nutzer des Requests (dict mit username, email, role, upgrade_requested) oder None.
+    Wird pro Request nur einmal berechnet; role/upgrade_requested sind immer aktuell.
+    """
+    try:
+        return request.account_user
+    except AttributeError:
+        pass
+    user = None
+    cookie = request.COOKIES.get(COOKIE_NAME)
+    with metrics.timed('cookie'):
+        data = _decode(cookie) if cookie else None
+        if data is not None:
+            status = _current_status(data['username'])
+            if status is not None:  # Nutzer existiert nicht (mehr) -> anonym
+                role, upgrade_requested = status
+                user = dict(data, role=role, upgrade_requested=upgrade_requested)  # Cache-Eintrag nicht verändern
+    request.account_user = user
+    return user
+
+
+async def aget_request_user(request):
+    # wie get_request_user für async Views/Middleware: ein evtl. nötiges Nachschlagen läuft im Storage-Pool
+    try:
+        return request.account_user
+    except AttributeError:
+        return await storage.aread('users', get_request_user, request)
+
+
+class AccountUserMiddleware:
+    # dekodiert das Cookie vor der View und legt den Nutzer als request.account_user ab
+    sync_capable = True
+    async_capable = True  # unter ASGI ohne Umweg über einen Thread (async Views bleiben async)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        get_request_user(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        await aget_request_user(request)
+        return await self.get_response(request)
+
+
+_profile_lock = threading.Lock()  # cProfile kann pro Prozess nur einen Request gleichzeitig aufzeichnen
+
+
+def _profile_file(route, total):
+    # Dateiname für die Profil-Daten: <zeit>_<pid>_<route>_<dauer>ms.prof (route ohne Sonderzeichen)
+    directory = getattr(settings, 'ACCOUNTS_PROFILE_DIR', os.path.join(str(settings.BASE_DIR), 'profiles'))
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r'[^A-Za-z0-9_-]+', '_', route or 'unknown')
+    return os.path.join(directory, f'{time.strftime("%Y%m%d_%H%M%S")}_{os.getpid()}_{name}_{total * 1000:.0f}ms.prof')
+
+
+class TimingMiddleware:
+    """
+    Misst jeden Request: Gesamtdauer, View (inkl. Template) und die Phasen aus Storage/Cookie
+    (siehe accounts/metrics.py). Sollte als erste Middleware eingetragen sein.
+
+    Settings:
+      ACCOUNTS_SERVER_TIMING        Server-Timing-Header senden (Standard: DEBUG)
+      ACCOUNTS_PROFILE_SAMPLE_RATE  Anteil der Requests, die mit cProfile laufen (0 = aus)
+      ACCOUNTS_PROFILE_SLOW_MS      nur Profile von Requests ab dieser Dauer speichern
+      ACCOUNTS_PROFILE_DIR          Zielverzeichnis der .prof-Dateien (Standard BASE_DIR/profiles)
+
+    Bei Streaming-Antworten (Export) ist nur die Zeit bis zum Start der Antwort enthalten. Unter ASGI
+    enthält ein cProfile-Profil alles, was währenddessen auf der Event-Loop lief (auch andere Requests).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # SQL-Zeiten über jede (neue) Datenbankverbindung messen, egal in welchem Thread sie läuft
+        connection_created.connect(_add_query_timer, dispatch_uid='accounts.metrics.timed_query')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token, timings = metrics.start()
+        started = time.perf_counter()
+        profiler = self._start_profiler()
+        try:
+            response = self.get_response(request)
+        finally:
+            total = self._finish(request, token, timings, started, profiler)
+        return self._add_header(response, timings, total)
+
+    async def __acall__(self, request):
+        token, timings = metrics.start()
+        started = time.perf_counter()
+        profiler = self._start_profiler()
+        try:
+            response = await self.get_response(request)
+        finally:
+            total = self._finish(request, token, timings, started, profiler)
+        return self._add_header(response, timings, total)
+
+    def _finish(self, request, token, timings, started, profiler):
+        total = time.perf_counter() - started
+        if profiler is not None:
+            self._stop_profiler(profiler, request, total)
+        view_started = getattr(request, '_accounts_view_started', None)
+        if view_started is not None:
+            timings.add('view', time.perf_counter() - view_started)
+        metrics.finish(token, timings, _route(request), total)
+        return total
+
+    @staticmethod
+    def _add_header(response, timings, total):
+        if getattr(settings, 'ACCOUNTS_SERVER_TIMING', settings.DEBUG):
+            response['Server-Timing'] = timings.server_timing(total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._accounts_view_started = time.perf_counter()
+
+    @staticmethod
+    def _start_profiler():
+        rate = getattr(settings, 'ACCOUNTS_PROFILE_SAMPLE_RATE', 0)
+        if not rate or random.random() >= rate or not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # anderer Profiler aktiv (z.B. Debugger)
+            _profile_lock.release()
+            return None
+        return profiler
+
+    @staticmethod
+    def _stop_profiler(profiler, request, total):
+        try:
+            profiler.disable()
+            if total * 1000 >= getattr(settings, 'ACCOUNTS_PROFILE_SLOW_MS', 500):
+                profiler.dump_stats(_profile_file(_route(request), total))
+        finally:
+            _profile_lock.release()
+
+
+def _route(request):
+    # Name der URL (z.B. 'accounts:home') für die Histogramme; unbekannte Pfade zusammenfassen
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else None
+
+
+def _add_query_timer(sender, connection, **kwargs):
+    # connection_created feuert bei jedem (Neu-)Verbinden desselben Wrappers -> nur einmal eintragen
+    if metrics.timed_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.timed_query)
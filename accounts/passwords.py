@@ -0,0 +1,120 @@
+"""
+Passwort-Hashing für accounts.json / SQLite-Backend (PBKDF2-SHA256 über Django's Hasher).
+
+- hash_password(raw): neuer Hash mit der Iterationszahl aus ACCOUNTS_PASSWORD_ITERATIONS
+- verify(raw, stored): (passt?, neu hashen?) - stored darf noch Klartext sein (Altbestand);
+  dann und bei veralteter Iterationszahl speichert authenticate nach erfolgreichem Login den neuen Hash
+- run_in_pool(fn, ...): führt die teure Prüfung in einem begrenzten Thread-Pool aus (für async Views);
+  hashlib.pbkdf2_hmac gibt dabei den GIL frei, mehrere Prüfungen laufen also wirklich parallel
+
+Erfolgreiche Prüfungen werden kurz gemerkt (ACCOUNTS_PASSWORD_CACHE_SECONDS, 0 = aus). Im Cache
+liegt nur ein HMAC mit einem zufälligen Schlüssel dieses Prozesses, nie das Passwort selbst.
+"""
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+ALGORITHM = PBKDF2PasswordHasher.algorithm  # 'pbkdf2_sha256'
+
+_CACHE_MAX = 1024
+_cache = OrderedDict()  # hmac(schlüssel, hash + passwort) -> gültig bis
+_cache_lock = threading.Lock()
+_cache_key = os.urandom(32)  # nur im Speicher dieses Prozesses
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class _Hasher(PBKDF2PasswordHasher):
+    # Iterationszahl (Arbeitsfaktor) aus settings.py statt Django-Standard
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'ACCOUNTS_PASSWORD_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+_hasher = _Hasher()
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(ALGORITHM + '$')
+
+
+def hash_password(raw):
+    return _hasher.encode(raw, _hasher.salt())
+
+
+def _cache_token(raw, stored):
+    return hmac.new(_cache_key, f'{stored}\0{raw}'.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _cached(token):
+    with _cache_lock:
+        until = _cache.get(token)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            del _cache[token]
+            return False
+        _cache.move_to_end(token)
+        return True
+
+
+def _remember(token):
+    seconds = getattr(settings, 'ACCOUNTS_PASSWORD_CACHE_SECONDS', 300)
+    if not seconds:
+        return
+    with _cache_lock:
+        _cache[token] = time.monotonic() + seconds
+        _cache.move_to_end(token)
+        if len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+
+
+def verify(raw, stored):
+    """
+    Prüft raw gegen den gespeicherten Wert. Rückgabe (ok, needs_rehash).
+    needs_rehash ist True, wenn stored noch Klartext ist oder mit einer anderen Iterationszahl erzeugt wurde.
+    """
+    if raw is None or not stored:
+        return False, False
+    if not is_hashed(stored):
+        # Altbestand im Klartext: konstante Vergleichszeit, nach Erfolg neu speichern
+        return hmac.compare_digest(str(stored).encode('utf-8'), str(raw).encode('utf-8')), True
+    token = _cache_token(raw, stored)
+    if _cached(token):
+        return True, False  # Hash ist unverändert -> Iterationszahl wurde schon beim ersten Mal geprüft
+    if not _hasher.verify(raw, stored):
+        return False, False
+    _remember(token)
+    return True, _hasher.must_update(stored)
+
+
+def verify_dummy(raw):
+    # für unbekannte Nutzer: gleicher Aufwand wie eine echte Prüfung (kein Rückschluss über die Antwortzeit)
+    _hasher.encode(raw or '', 'dummysalt')
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'ACCOUNTS_PASSWORD_WORKERS', os.cpu_count() or 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='accounts-password')
+        return _executor
+
+
+async def run_in_pool(fn, *args):
+    # fn(*args) im Passwort-Pool ausführen, ohne die Event-Loop zu blockieren; der Kontext
+    # (z.B. die Zeitmessung des Requests, accounts/metrics.py) wird in den Pool-Thread übernommen
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_pool(), ctx.run, fn, *args)
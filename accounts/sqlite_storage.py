@@ -0,0 +1,510 @@
+"""
+SQLite-Backend für accounts.storage (ACCOUNTS_STORAGE_BACKEND = 'sqlite' in settings.py).
+
+Gleiche öffentliche Funktionen wie storage.py, aber Nutzer und Reports liegen in Tabellen
+der Django-Datenbank (DATABASES, standardmäßig db.sqlite3). Die Tabellen werden beim ersten
+Zugriff angelegt; bestehende JSON-Daten übernimmt: python manage.py import_json_storage
+"""
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import passwords
+
+__all__ = [
+    'load_users', 'save_users', 'add_user', 'find_user', 'find_user_by_email', 'authenticate',
+    'update_user_role', 'request_upgrade', 'accept_upgrade', 'deny_upgrade', 'pending_upgrades', 'search_users',
+    'users_version',
+    'load_reports', 'save_reports', 'delete_reports', 'delete_report_by_id', 'add_report', 'get_reports_for_user',
+    'get_reports_in_range', 'iter_reports_for_user', 'get_reports_page', 'summarize_reports', 'rollup_reports', 'overwrite_user_reports',
+    'append_user_reports', 'organisation_summary', 'search_reports', 'iter_all_reports',
+]
+
+_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS accounts_account (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        email TEXT,
+        email_lower TEXT,
+        password TEXT,
+        role TEXT NOT NULL DEFAULT 'user',
+        upgrade_requested INTEGER NOT NULL DEFAULT 0
+    )''',
+    'CREATE INDEX IF NOT EXISTS accounts_account_email_idx ON accounts_account (email_lower)',
+    # partieller Index: enthält nur offene Upgrade-Anfragen -> Abfrage kostet O(Anzahl Anfragen)
+    'CREATE INDEX IF NOT EXISTS accounts_account_upgrade_idx ON accounts_account (username) WHERE upgrade_requested = 1',
+    # Admin-Liste: Präfixsuche/Sortierung auf lower(username), Rollenfilter in Namensreihenfolge
+    'CREATE INDEX IF NOT EXISTS accounts_account_name_idx ON accounts_account (lower(username))',
+    'CREATE INDEX IF NOT EXISTS accounts_account_role_idx ON accounts_account (role, lower(username))',
+    '''CREATE TABLE IF NOT EXISTS accounts_workreport (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        minutes INTEGER NOT NULL DEFAULT 0,
+        date TEXT NOT NULL DEFAULT '',
+        module TEXT NOT NULL DEFAULT '',
+        content TEXT NOT NULL DEFAULT ''
+    )''',
+    'CREATE INDEX IF NOT EXISTS accounts_workreport_user_date_idx ON accounts_workreport (username, date)',
+    'CREATE INDEX IF NOT EXISTS accounts_workreport_user_module_idx ON accounts_workreport (username, module)',
+    # Volltextsuche (search_reports): FTS5-Index über module + content, per Trigger aktuell gehalten
+    """CREATE VIRTUAL TABLE IF NOT EXISTS accounts_workreport_fts USING fts5(
+        module, content, content='accounts_workreport', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_workreport_fts_ai AFTER INSERT ON accounts_workreport BEGIN
+        INSERT INTO accounts_workreport_fts (rowid, module, content) VALUES (new.id, new.module, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_workreport_fts_ad AFTER DELETE ON accounts_workreport BEGIN
+        INSERT INTO accounts_workreport_fts (accounts_workreport_fts, rowid, module, content)
+        VALUES ('delete', old.id, old.module, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_workreport_fts_au AFTER UPDATE ON accounts_workreport BEGIN
+        INSERT INTO accounts_workreport_fts (accounts_workreport_fts, rowid, module, content)
+        VALUES ('delete', old.id, old.module, old.content);
+        INSERT INTO accounts_workreport_fts (rowid, module, content) VALUES (new.id, new.module, new.content);
+    END""",
+]
+
+_USER_COLUMNS = 'username, email, password, role, upgrade_requested'
+_REPORT_COLUMNS = 'username, minutes, date, module, content'
+_REPORT_SELECT = 'id, ' + _REPORT_COLUMNS  # Report-ID ist der Primärschlüssel (als String nach außen)
+
+_schema_ready = set()  # Datenbanken (NAME), für die das Schema schon angelegt wurde
+
+
+def _connection():
+    # Alias aus settings.py (ACCOUNTS_SQLITE_DATABASE), Standard ist die 'default'-Datenbank
+    conn = connections[getattr(settings, 'ACCOUNTS_SQLITE_DATABASE', 'default')]
+    name = str(conn.settings_dict.get('NAME'))
+    if name not in _schema_ready:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'accounts_workreport_fts'")
+            fts_missing = cur.fetchone() is None
+            for statement in _SCHEMA:
+                cur.execute(statement)
+            if fts_missing:
+                # Suchindex neu angelegt -> einmalig aus den schon vorhandenen Reports füllen
+                cur.execute("INSERT INTO accounts_workreport_fts (accounts_workreport_fts) VALUES ('rebuild')")
+        _schema_ready.add(name)
+    return conn
+
+
+def _atomic():
+    return transaction.atomic(using=getattr(settings, 'ACCOUNTS_SQLITE_DATABASE', 'default'))
+
+
+def _fetchall(sql, params=()):
+    with _connection().cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def _execute(sql, params=()):
+    # führt eine Änderung aus und gibt die Anzahl betroffener Zeilen zurück
+    with _connection().cursor() as cur:
+        cur.execute(sql, params)
+        return cur.rowcount
+
+
+def _user_row(row):
+    username, email, password, role, upgrade_requested = row
+    return {
+        'username': username,
+        'email': email,
+        'password': password,
+        'role': role or 'user',
+        'upgrade_requested': bool(upgrade_requested),
+    }
+
+
+def _user_params(u):
+    email = u.get('email')
+    return (u.get('username'), email, (email or '').strip().lower(), u.get('password'),
+            u.get('role', 'user') or 'user', 1 if u.get('upgrade_requested') else 0)
+
+
+def _report_row(row):
+    report_id, username, minutes, date, module, content = row
+    return {'id': str(report_id), 'username': username, 'minutes': minutes, 'date': date, 'module': module,
+            'content': content}
+
+
+def _report_params(r):
+    try:
+        minutes = int(r.get('minutes', 0))
+    except Exception:
+        minutes = 0
+    return (r.get('username'), minutes, str(r.get('date', '')), r.get('module', '') or '', r.get('content', '') or '')
+
+
+"""
+/////////////////Nutzer/////////////////
+"""
+
+def load_users():
+    return [_user_row(row) for row in _fetchall(f'SELECT {_USER_COLUMNS} FROM accounts_account ORDER BY id')]
+
+
+def _insert_users(cur, users):
+    # INSERT OR IGNORE: bei doppelten Benutzernamen gewinnt wie im JSON-Backend der erste Eintrag
+    cur.executemany(
+        'INSERT OR IGNORE INTO accounts_account (username, email, email_lower, password, role, upgrade_requested) '
+        'VALUES (%s, %s, %s, %s, %s, %s)',
+        [_user_params(u) for u in users])
+
+
+def save_users(users):
+    # ersetzt alle Nutzer (in einer Transaktion)
+    with _atomic(), _connection().cursor() as cur:
+        cur.execute('DELETE FROM accounts_account')
+        _insert_users(cur, users)
+
+
+def _user_conflict(userobj):
+    if find_user(userobj.get('username')) is not None:
+        return 'username exists'
+    if find_user_by_email(userobj.get('email')) is not None:
+        return 'email exists'
+    return None
+
+
+def add_user(userobj):
+    # vorhandene Namen/E-Mails vor dem teuren Hash ablehnen, in der Transaktion erneut prüfen
+    error = _user_conflict(userobj)
+    if error:
+        return False, error
+    userobj = dict(userobj, password=passwords.hash_password(userobj.get('password') or ''))
+    with _atomic():
+        error = _user_conflict(userobj)
+        if error:
+            return False, error
+        _execute(
+            'INSERT INTO accounts_account (username, email, email_lower, password, role, upgrade_requested) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            _user_params(userobj))
+    return True, None
+
+
+def find_user(username):
+    rows = _fetchall(f'SELECT {_USER_COLUMNS} FROM accounts_account WHERE username = %s', (username,))
+    return _user_row(rows[0]) if rows else None
+
+
+def find_user_by_email(email):
+    rows = _fetchall(f'SELECT {_USER_COLUMNS} FROM accounts_account WHERE email_lower = %s ORDER BY id LIMIT 1',
+                     ((email or '').strip().lower(),))
+    return _user_row(rows[0]) if rows else None
+
+
+def authenticate(username, password):
+    user = find_user(username)
+    if not user:
+        passwords.verify_dummy(password)
+        return None
+    ok, needs_rehash = passwords.verify(password, user.get('password'))
+    if not ok:
+        return None
+    if needs_rehash:
+        # nur ersetzen, wenn das Passwort seit der Prüfung unverändert ist
+        _execute('UPDATE accounts_account SET password = %s WHERE username = %s AND password = %s',
+                 (passwords.hash_password(password), username, user.get('password')))
+    return {
+        'username': user['username'],
+        'email': user['email'],
+        'role': user['role'],
+        'upgrade_requested': user['upgrade_requested'],
+    }
+
+
+def update_user_role(username, new_role):
+    return _execute('UPDATE accounts_account SET role = %s WHERE username = %s', (new_role, username)) > 0
+
+
+def request_upgrade(username):
+    # Admins und bereits offene Anfragen werden über die WHERE-Bedingung ausgeschlossen
+    return _execute(
+        "UPDATE accounts_account SET upgrade_requested = 1 "
+        "WHERE username = %s AND role != 'admin' AND upgrade_requested = 0", (username,)) > 0
+
+
+def accept_upgrade(username):
+    # user -> vip, vip -> admin, sonst keine Änderung
+    return _execute(
+        "UPDATE accounts_account SET upgrade_requested = 0, "
+        "role = CASE role WHEN 'user' THEN 'vip' ELSE 'admin' END "
+        "WHERE username = %s AND role IN ('user', 'vip')", (username,)) > 0
+
+
+def deny_upgrade(username):
+    return _execute(
+        'UPDATE accounts_account SET upgrade_requested = 0 WHERE username = %s AND upgrade_requested = 1',
+        (username,)) > 0
+
+
+def users_version():
+    # ändert sich bei jeder Änderung der Datenbank: data_version zählt Commits anderer Verbindungen,
+    # total_changes die Änderungen dieser Verbindung (gröber als nötig, aber ohne eigene Buchführung)
+    conn = _connection()
+    conn.ensure_connection()
+    data_version = _fetchall('PRAGMA data_version')[0][0]
+    return data_version, conn.connection.total_changes
+
+
+def pending_upgrades():
+    # offene Upgrade-Anfragen über den partiellen Index
+    return [_user_row(row) for row in _fetchall(
+        f'SELECT {_USER_COLUMNS} FROM accounts_account WHERE upgrade_requested = 1 ORDER BY lower(username), id')]
+
+
+def search_users(query='', role=None, page=1, per_page=50):
+    # Präfixsuche als Bereichsabfrage (>= präfix AND < präfix + max. Zeichen), damit die Indizes greifen
+    page = max(int(page), 1)
+    where, params = [], []
+    query = (query or '').strip().lower()
+    if query:
+        where.append('((lower(username) >= %s AND lower(username) < %s) OR (email_lower >= %s AND email_lower < %s))')
+        params += [query, query + '\U0010ffff'] * 2
+    if role:
+        where.append('role = %s')
+        params.append(role)
+    clause = (' WHERE ' + ' AND '.join(where)) if where else ''
+    total = _fetchall(f'SELECT COUNT(*) FROM accounts_account{clause}', params)[0][0]
+    rows = _fetchall(
+        f'SELECT {_USER_COLUMNS} FROM accounts_account{clause} ORDER BY lower(username), id LIMIT %s OFFSET %s',
+        params + [per_page, (page - 1) * per_page])
+    return {
+        'users': [_user_row(row) for row in rows],
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'has_next': page * per_page < total,
+    }
+
+
+"""
+/////////////////Arbeitsberichte/////////////////
+"""
+
+def load_reports():
+    return [_report_row(row) for row in _fetchall(f'SELECT {_REPORT_SELECT} FROM accounts_workreport ORDER BY id')]
+
+
+def _insert_reports(cur, reports):
+    cur.executemany(
+        f'INSERT INTO accounts_workreport ({_REPORT_COLUMNS}) VALUES (%s, %s, %s, %s, %s)',
+        (_report_params(r) for r in reports))  # Generator: Iteratoren werden gestreamt
+
+
+def save_reports(reports):
+    with _atomic(), _connection().cursor() as cur:
+        cur.execute('DELETE FROM accounts_workreport')
+        _insert_reports(cur, reports)
+
+
+def delete_reports(username, minutes, date_str, module, content):
+    # (username, date)-Index grenzt ein, der Rest wird wie im JSON-Backend als Text verglichen
+    _execute(
+        'DELETE FROM accounts_workreport WHERE username = %s AND date = %s '
+        'AND CAST(minutes AS TEXT) = %s AND module = %s AND content = %s',
+        (username, str(date_str), str(minutes), module, content))
+
+
+def delete_report_by_id(username, report_id):
+    try:
+        report_id = int(report_id)
+    except (TypeError, ValueError):
+        return False  # IDs im SQLite-Backend sind ganzzahlig
+    return _execute('DELETE FROM accounts_workreport WHERE id = %s AND username = %s', (report_id, username)) > 0
+
+
+def add_report(username, minutes, date_str, module, content):
+    _execute(
+        f'INSERT INTO accounts_workreport ({_REPORT_COLUMNS}) VALUES (%s, %s, %s, %s, %s)',
+        (username, int(minutes), str(date_str), module, content))
+    return True
+
+
+def get_reports_for_user(username):
+    return [_report_row(row) for row in _fetchall(
+        f'SELECT {_REPORT_SELECT} FROM accounts_workreport WHERE username = %s ORDER BY id', (username,))]
+
+
+def _range_clause(date_from, date_to):
+    # zusätzliche WHERE-Bedingung für den (username, date)-Index; Grenzen inklusive, None = offen
+    sql, params = '', []
+    if date_from:
+        sql += ' AND date >= %s'
+        params.append(str(date_from))
+    if date_to:
+        sql += ' AND date <= %s'
+        params.append(str(date_to))
+    return sql, params
+
+
+def get_reports_in_range(username, date_from=None, date_to=None):
+    where, params = _range_clause(date_from, date_to)
+    return [_report_row(row) for row in _fetchall(
+        f'SELECT {_REPORT_SELECT} FROM accounts_workreport WHERE username = %s{where} ORDER BY date, id',
+        [username] + params)]
+
+
+def iter_reports_for_user(username, date_from=None, date_to=None, chunk_size=1000):
+    """
+    Generator in Blöcken von chunk_size Zeilen (Keyset-Pagination über (date, id) bzw. id),
+    damit weder eine Liste aller Reports noch ein langlebiger Cursor nötig ist.
+    """
+    where, params = _range_clause(date_from, date_to)
+    ordered = bool(date_from or date_to)
+    last = None
+    while True:
+        if last is None:
+            after, after_params = '', []
+        elif ordered:
+            after, after_params = ' AND (date > %s OR (date = %s AND id > %s))', [last[0], last[0], last[1]]
+        else:
+            after, after_params = ' AND id > %s', [last[1]]
+        order = 'date, id' if ordered else 'id'
+        rows = _fetchall(
+            f'SELECT {_REPORT_SELECT} FROM accounts_workreport WHERE username = %s{where}{after} '
+            f'ORDER BY {order} LIMIT %s', [username] + params + after_params + [chunk_size])
+        for row in rows:
+            yield _report_row(row)
+        if len(rows) < chunk_size:
+            return
+        last = (rows[-1][3], rows[-1][0])  # (date, id) der letzten Zeile
+
+
+def iter_all_reports(chunk_size=1000):
+    # alle Reports aller Nutzer in Blöcken (Keyset-Pagination über id), wie iter_reports_for_user
+    last = 0
+    while True:
+        rows = _fetchall(
+            f'SELECT {_REPORT_SELECT} FROM accounts_workreport WHERE id > %s ORDER BY id LIMIT %s', (last, chunk_size))
+        for row in rows:
+            yield _report_row(row)
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
+
+
+def get_reports_page(username, page=1, per_page=50):
+    # eine Seite absteigend nach Datum über den (username, date)-Index; Format wie storage.get_reports_page
+    page = max(int(page), 1)
+    total = _fetchall('SELECT COUNT(*) FROM accounts_workreport WHERE username = %s', (username,))[0][0]
+    rows = _fetchall(
+        f'SELECT {_REPORT_SELECT} FROM accounts_workreport WHERE username = %s '
+        'ORDER BY date DESC, id DESC LIMIT %s OFFSET %s', (username, per_page, (page - 1) * per_page))
+    return {
+        'reports': [_report_row(row) for row in rows],
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'has_next': page * per_page < total,
+    }
+
+
+def search_reports(username, query, page=1, per_page=50):
+    # FTS5: jedes Wort als Phrase in Anführungszeichen (kein Operator-Parsing), mehrere Wörter = UND
+    from .storage import _tokens
+    page = max(int(page), 1)
+    words = sorted(_tokens(query))
+    if not words:
+        return {'reports': [], 'page': page, 'per_page': per_page, 'total': 0, 'has_next': False}
+    match = ' '.join('"%s"' % word for word in words)
+    where = ('WHERE username = %s AND id IN '
+             '(SELECT rowid FROM accounts_workreport_fts WHERE accounts_workreport_fts MATCH %s)')
+    total = _fetchall(f'SELECT COUNT(*) FROM accounts_workreport {where}', (username, match))[0][0]
+    rows = _fetchall(
+        f'SELECT {_REPORT_SELECT} FROM accounts_workreport {where} ORDER BY date DESC, id DESC LIMIT %s OFFSET %s',
+        (username, match, per_page, (page - 1) * per_page))
+    return {
+        'reports': [_report_row(row) for row in rows],
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'has_next': page * per_page < total,
+    }
+
+
+def summarize_reports(username, date_from=None, date_to=None):
+    # Summen pro Modul direkt in SQLite über den (username, module)-Index; Format wie storage.summarize_reports
+    from .storage import _summary_from_totals
+    where, params = _range_clause(date_from, date_to)
+    rows = _fetchall(
+        "SELECT CASE WHEN module = '' THEN 'unknown' ELSE module END AS mod, SUM(minutes) "
+        f'FROM accounts_workreport WHERE username = %s{where} GROUP BY mod ORDER BY MIN(id)', [username] + params)
+    return _summary_from_totals({mod: int(mins or 0) for mod, mins in rows})
+
+
+def rollup_reports(username, period='month', date_from=None, date_to=None):
+    # Tagessummen in SQLite, Zusammenfassen zu Wochen/Monaten wie im JSON-Backend
+    from .storage import ROLLUP_PERIODS, _rollup_from_days
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f'unknown period: {period}')
+    where, params = _range_clause(date_from, date_to)
+    rows = _fetchall(
+        f'SELECT date, SUM(minutes), COUNT(*) FROM accounts_workreport WHERE username = %s{where} '
+        'GROUP BY date ORDER BY date', [username] + params)
+    return _rollup_from_days([(d, int(m or 0), c) for d, m, c in rows], period)
+
+
+def organisation_summary():
+    # Gruppierung direkt in SQLite (drei GROUP BY-Abfragen), Wochen werden aus Tagessummen gebildet
+    from .storage import _organisation_summary, _week_of
+    by_user = {u: [int(m or 0), c] for u, m, c in _fetchall(
+        'SELECT username, SUM(minutes), COUNT(*) FROM accounts_workreport GROUP BY username')}
+    by_module = {mod: [int(m or 0), c] for mod, m, c in _fetchall(
+        "SELECT CASE WHEN module = '' THEN 'unknown' ELSE module END AS mod, SUM(minutes), COUNT(*) "
+        'FROM accounts_workreport GROUP BY mod')}
+    by_week = {}
+    for date, mins, count in _fetchall('SELECT date, SUM(minutes), COUNT(*) FROM accounts_workreport GROUP BY date'):
+        entry = by_week.setdefault(_week_of(date), [0, 0])
+        entry[0] += int(mins or 0)
+        entry[1] += count
+    return _organisation_summary(by_user, by_module, by_week)
+
+
+def overwrite_user_reports(username, new_reports):
+    # new_reports darf ein Iterator sein (Streaming-Import): Zeilen gehen direkt in executemany
+    with _atomic(), _connection().cursor() as cur:
+        cur.execute('DELETE FROM accounts_workreport WHERE username = %s', (username,))
+        _insert_reports(cur, (dict(r, username=username) for r in new_reports))
+    return True
+
+
+def append_user_reports(username, new_reports, merge=False):
+    """
+    Hängt new_reports an (Modus 'append'); mit merge=True werden Reports mit gleichem Datum, Modul und
+    Text übersprungen. Die Prüfung läuft pro Zeile über den (username, date)-Index, vergleicht also
+    nur Reports desselben Tages; Duplikate innerhalb des Imports fallen dadurch ebenfalls weg.
+    Rückgabe: Anzahl tatsächlich hinzugefügter Reports.
+    """
+    rows = (dict(r, username=username) for r in new_reports)
+    with _atomic(), _connection().cursor() as cur:
+        if not merge:
+            _insert_reports(cur, rows)
+        else:
+            cur.executemany(
+                f'INSERT INTO accounts_workreport ({_REPORT_COLUMNS}) SELECT %s, %s, %s, %s, %s '
+                'WHERE NOT EXISTS (SELECT 1 FROM accounts_workreport WHERE username = %s AND date = %s '
+                'AND module = %s AND content = %s)',
+                (params + (params[0], params[2], params[3], params[4]) for params in map(_report_params, rows)))
+        return max(cur.rowcount, 0)  # executemany: Summe der eingefügten Zeilen
+
+
+def import_json(users, reports):
+    """
+    Einmaliger Bulk-Import (manage.py import_json_storage): ersetzt den Tabelleninhalt
+    durch die übergebenen Listen, alles in einer Transaktion.
+    """
+    with _atomic(), _connection().cursor() as cur:
+        cur.execute('DELETE FROM accounts_account')
+        cur.execute('DELETE FROM accounts_workreport')
+        _insert_users(cur, users)
+        _insert_reports(cur, reports)
+
+
+def table_counts():
+    # Anzahl Zeilen je Tabelle, z.B. um vor einem Import zu prüfen, ob schon Daten vorhanden sind
+    return {
+        'users': _fetchall('SELECT COUNT(*) FROM accounts_account')[0][0],
+        'reports': _fetchall('SELECT COUNT(*) FROM accounts_workreport')[0][0],
+    }
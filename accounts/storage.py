@@ -1,88 +1,577 @@
+import asyncio
+import atexit
+import bisect
+import contextvars
+import datetime
+import functools
 import json
+import logging
 import os
+import re
+import stat
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from . import journal, metrics, passwords
+
+try:
+    import fcntl  # Unix: prozessübergreifende Sperren (mehrere gunicorn/uvicorn-Worker)
+except ImportError:  # Windows: nur Sperre innerhalb des Prozesses
+    fcntl = None
 
 # Pfad zur JSON-Datei im Projektverzeichnis (BASE_DIR/accounts.json)
 _DATA_FILE = os.path.join(str(settings.BASE_DIR), 'accounts.json')
 
+"""
+/////////////////In-Process-Cache/////////////////
+"""
+
+# Cache für die geparsten JSON-Dateien: Pfad -> {'sig': (mtime_ns, size, inode), 'data': <obj>}
+# Neu geladen wird nur, wenn sich die Datei-Signatur ändert (z.B. anderer Prozess hat geschrieben)
+# oder wenn dieser Prozess selbst schreibt (dann wird der Eintrag direkt ersetzt).
+# 'data' ist entweder die Liste selbst oder ein daraus gebautes Objekt (z.B. _ReportsTable mit Index).
+_cache = {}
+_cache_lock = threading.RLock()  # schützt _cache, _cache_stats und _load_locks (nur kurz halten, nie beim Laden)
+_cache_stats = {'hits': 0, 'misses': 0}
+_load_locks = {}  # pfad -> Lock: eine Datei wird nur von einem Thread gleichzeitig neu geladen
+
+def _load_lock(path):
+    # Sperre für das Neuladen einer Datei; Cache-Treffer und andere Dateien warten nicht darauf
+    with _cache_lock:
+        lock = _load_locks.get(path)
+        if lock is None:
+            lock = _load_locks[path] = threading.Lock()
+        return lock
+
+def _cache_lookup(path, sig):
+    # (Eintrag, Treffer?) für die aktuelle Signatur; zählt Treffer mit
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None and sig is not None and entry['sig'] == sig:
+            _cache_stats['hits'] += 1
+            return entry, True
+        return entry, False
+
+def _cache_store(path, sig, data, previous):
+    # übernimmt einen geladenen Stand, außer ein Schreiber hat inzwischen einen neueren abgelegt (_remember)
+    with _cache_lock:
+        if _cache.get(path) is previous:
+            _cache[path] = {'sig': sig, 'data': data}
+
+def _cache_enabled():
+    # Schalter in settings.py (ACCOUNTS_STORAGE_CACHE); in Tests per override_settings abschaltbar
+    return getattr(settings, 'ACCOUNTS_STORAGE_CACHE', True)
+
+def _file_signature(path):
+    # mtime, Größe und Inode ändern sich bei jedem Schreibvorgang (auch bei os.replace)
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _read_snapshot(path):
+    """
+    Liest eine JSON-Liste direkt von der Platte (ohne Cache).
+    Rückgabe (liste, crc32 der Bytes, ok). Bei kaputtem Inhalt: ([], crc, False) -> Lesen liefert
+    weiterhin eine leere Liste, aber Schreibzugriffe verweigern das Überschreiben (siehe _check_writable).
+    Nur eine fehlende Datei gilt als leer; andere Lesefehler (EIO, EMFILE, ...) werden weitergereicht,
+    damit nie ein leerer Stand im Cache landet und beim nächsten Schreiben die echten Daten ersetzt.
+    Lese- und Parse-Zeit landen in den Request-Metriken (storage_read / storage_parse).
+    """
+    started = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return [], None, True
+    parse_started = time.perf_counter()
+    metrics.record('storage_read', parse_started - started, len(raw))
+    try:
+        data = json.loads(raw.decode('utf-8'))  # lade JSON-Inhalt
+    except Exception:
+        return [], journal.crc(raw), False  # bei Fehlern leere Liste zurückgeben, aber als kaputt markieren
+    finally:
+        metrics.record('storage_parse', time.perf_counter() - parse_started)
+    if not isinstance(data, list):
+        return [], journal.crc(raw), False  # falls Datei kaputt -> leere Liste
+    return data, journal.crc(raw), True
+
+def _read_json_list(path):
+    # liest eine JSON-Liste direkt von der Platte (ohne Cache)
+    return _read_snapshot(path)[0]
+
+def _load_cached(path, build):
+    """
+    Liefert build(<geparste Liste>) aus dem Cache oder liest die Datei neu ein.
+    Die Signatur wird VOR dem Lesen bestimmt: ändert sich die Datei währenddessen,
+    passt die Signatur beim nächsten Aufruf nicht mehr und es wird erneut gelesen.
+    Achtung: das Ergebnis ist die gecachte Instanz -> nur über _remember() ersetzen.
+    """
+    if not _cache_enabled():
+        return _build_checked(path, build)
+    entry, hit = _cache_lookup(path, _safe_signature(path))
+    if hit:
+        return entry['data']
+    with _load_lock(path):
+        sig = _safe_signature(path)
+        entry, hit = _cache_lookup(path, sig)  # ein anderer Thread hat evtl. gerade geladen
+        if hit:
+            return entry['data']
+        with _cache_lock:
+            _cache_stats['misses'] += 1
+        data = _build_checked(path, build)
+        if sig is not None:
+            _cache_store(path, sig, data, entry)
+        return data
+
+def _build_checked(path, build):
+    # baut die Tabelle und merkt sich, ob die Datei lesbar war
+    data, _crc, ok = _read_snapshot(path)
+    with metrics.timed('storage_index'):
+        table = build(data)
+    table.damaged = not ok
+    return table
+
+def _check_writable(table, path):
+    # eine unlesbare Datei nie mit dem (leeren) Stand im Speicher überschreiben -> sonst Datenverlust
+    if getattr(table, 'damaged', False):
+        raise RuntimeError(f'{os.path.basename(path)} ist nicht lesbar und wird nicht überschrieben')
+
+# umask des Prozesses (einmal beim Import gelesen; os.umask() zum Lesen ist nicht thread-sicher)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _file_mode(path):
+    # Rechte für eine neu geschriebene Datei: die der vorhandenen Datei, sonst wie open() (0o666 ohne umask).
+    # mkstemp legt Dateien mit 0600 an, os.replace übernimmt das -> ohne chmod nur noch für den Besitzer lesbar
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+def _write_json_list(path, data):
+    """
+    Schreibt die komplette Liste atomar: erst in eine temporäre Datei im selben Verzeichnis,
+    dann os.replace(). Leser sehen so immer entweder die alte oder die neue Datei, nie eine halbe.
+    Cache wird separat über _remember() gesetzt.
+    Rückgabe: crc32 der geschriebenen Bytes (Snapshot-Kennung für das Journal)
+    """
+    raw = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    started = time.perf_counter()
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())  # Inhalt auf der Platte, bevor die Datei sichtbar wird
+            os.chmod(tmp, _file_mode(path))  # Rechte der bisherigen Datei behalten
+            os.replace(tmp, path)  # atomarer Austausch
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+    except Exception:
+        _forget(path)  # Stand im Speicher ist evtl. schon verändert -> beim nächsten Lesen neu laden
+        raise
+    _record_write(len(raw), time.perf_counter() - started)
+    return journal.crc(raw)
+
+def _remember(path, data, sig=None):
+    # legt den gerade geschriebenen Stand mit der neuen Datei-Signatur im Cache ab (kein erneutes Parsen)
+    if _cache_enabled():
+        with _cache_lock:
+            _cache[path] = {'sig': sig if sig is not None else _file_signature(path), 'data': data}
+
+def _forget(path):
+    # verwirft den Cache-Eintrag einer Datei
+    with _cache_lock:
+        _cache.pop(path, None)
+
+def clear_cache():
+    # verwirft alle gecachten Listen (z.B. in Tests nach direktem Dateizugriff)
+    with _cache_lock:
+        _cache.clear()
+
+def cache_stats():
+    # liefert eine Kopie der Zähler: {'hits': <int>, 'misses': <int>, 'entries': <int>}
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_cache))
+
+def reset_cache_stats():
+    # setzt die Hit/Miss-Zähler zurück
+    with _cache_lock:
+        for key in _cache_stats:
+            _cache_stats[key] = 0
+
+"""
+/////////////////Sperren für Lese-Ändern-Schreiben/////////////////
+"""
+
+# Messwerte: wie lange wurde auf Sperren gewartet und wie lange dauerten Schreibvorgänge
+_io_stats = {
+    'lock_acquisitions': 0,
+    'lock_wait_seconds_total': 0.0,
+    'lock_wait_seconds_max': 0.0,
+    'writes': 0,
+    'write_bytes_total': 0,
+    'write_seconds_total': 0.0,
+}
+_io_stats_lock = threading.Lock()
+
+def _record_lock_wait(seconds):
+    metrics.record('lock_wait', seconds)  # Anteil des laufenden Requests (Server-Timing)
+    with _io_stats_lock:
+        _io_stats['lock_acquisitions'] += 1
+        _io_stats['lock_wait_seconds_total'] += seconds
+        _io_stats['lock_wait_seconds_max'] = max(_io_stats['lock_wait_seconds_max'], seconds)
+
+def _record_write(nbytes, seconds):
+    metrics.record('storage_write', seconds, nbytes)
+    with _io_stats_lock:
+        _io_stats['writes'] += 1
+        _io_stats['write_bytes_total'] += nbytes
+        _io_stats['write_seconds_total'] += seconds
+
+def io_stats():
+    # Kopie der Messwerte (Sperr-Wartezeit und Schreibzeit in Sekunden)
+    with _io_stats_lock:
+        return dict(_io_stats)
+
+def reset_io_stats():
+    with _io_stats_lock:
+        for key in _io_stats:
+            _io_stats[key] = 0
+
+class _FileLock:
+    """
+    Sperre für einen Lese-Ändern-Schreiben-Zyklus auf einer Datei:
+    Thread-Lock innerhalb des Prozesses plus fcntl.flock auf <datei>.lock für andere Prozesse.
+    Reentrant im selben Thread (z.B. compact_reports -> _persist_reports_table); nur die
+    äußerste Ebene holt die Datei-Sperre und misst die Wartezeit.
+    """
+
+    def __init__(self, path):
+        self.path = path + '.lock'
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._owner = None  # Thread-ID des Halters (für held())
+
+    def __enter__(self):
+        started = time.perf_counter()
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX)  # blockiert, bis kein anderer Prozess schreibt
+                    except BaseException:
+                        os.close(fd)
+                        raise
+                    self._fd = fd
+            except BaseException:
+                self._lock.release()
+                raise
+            _record_lock_wait(time.perf_counter() - started)
+            self._owner = threading.get_ident()
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+        if self._depth == 0 and self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+        self._lock.release()
+        return False
+
+    def held(self):
+        # True, wenn der aufrufende Thread die Sperre gerade hält
+        return self._owner == threading.get_ident()
+
+    def in_process(self):
+        # nur die Thread-Sperre (ohne flock): für Änderungen, die allein den Speicherstand betreffen
+        return self._lock
+
+def _create_if_missing(path):
+    # legt eine Datei mit leerer JSON-Liste an, ohne eine parallel angelegte zu überschreiben
+    dirpath = os.path.dirname(path) or '.'
+    os.makedirs(dirpath, exist_ok=True)  # erstelle Verzeichnis falls nötig
+    if not os.path.exists(path):
+        _link_new_file(path, b'[]')
+
+def _link_new_file(path, raw):
+    # erst komplett in eine temporäre Datei schreiben, dann per os.link sichtbar machen: atomar, und nur,
+    # wenn es path noch nicht gibt (ein Leser sieht nie eine leere, halb geschriebene Datei)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+        os.chmod(tmp, _file_mode(path))
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+    finally:
+        os.remove(tmp)
+
 def _ensure_file():
     # sorgt dafür, dass die Datei existiert; falls nicht, erstelle sie und schreibe ein leeres Array
-    dirpath = os.path.dirname(_DATA_FILE) or '.'
-    os.makedirs(dirpath, exist_ok=True)  # erstelle Verzeichnis falls nötig
-    if not os.path.exists(_DATA_FILE):
-        with open(_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f)  # lege leere Liste als JSON an
+    _create_if_missing(_DATA_FILE)
+
+# serialisiert Lese-Ändern-Schreiben auf accounts.json (Threads und Prozesse)
+_users_write_lock = _FileLock(_DATA_FILE)
+
+class _UsersTable:
+    """
+    User-Liste im Speicher plus Hash-Index username -> Position und email (klein geschrieben) -> Position.
+    Bei doppelten Einträgen gewinnt wie bisher der erste in der Datei.
+    Für die Admin-Liste zusätzlich sortierte Indizes (Präfixsuche, Seiten nach Name, Rollenfilter)
+    und die Menge der offenen Upgrade-Anfragen.
+    """
+
+    damaged = False  # True, wenn accounts.json beim Laden nicht lesbar war
+
+    def __init__(self, users):
+        self.users = list(users)
+        self.by_username = {}
+        self.by_email = {}
+        self.sorted_names = []  # [(username klein, position)], sortiert
+        self.sorted_emails = []  # [(email klein, position)], sortiert
+        self.by_role = {}  # rolle -> [(username klein, position)], sortiert
+        self.pending = set()  # Positionen mit upgrade_requested
+        for pos, u in enumerate(self.users):
+            self._index(pos, u, insert=list.append)
+        # einmal sortieren statt bei jedem Eintrag einfügen
+        self.sorted_names.sort()
+        self.sorted_emails.sort()
+        for entries in self.by_role.values():
+            entries.sort()
+
+    def _index(self, pos, u, insert=bisect.insort):
+        self.by_username.setdefault(u.get('username'), pos)
+        email = (u.get('email') or '').strip().lower()
+        if email:
+            self.by_email.setdefault(email, pos)
+            insert(self.sorted_emails, (email, pos))
+        name = _name_key(u)
+        insert(self.sorted_names, (name, pos))
+        insert(self.by_role.setdefault(u.get('role') or 'user', []), (name, pos))
+        if u.get('upgrade_requested'):
+            self.pending.add(pos)
+
+    def get(self, username):
+        pos = self.by_username.get(username)
+        return self.users[pos] if pos is not None else None
+
+    def email_taken(self, email):
+        return (email or '').strip().lower() in self.by_email
+
+    def append(self, u):
+        self.users.append(u)
+        self._index(len(self.users) - 1, u)
+
+    def set_role(self, username, new_role):
+        # ändert die Rolle und verschiebt den Eintrag im Rollen-Index
+        pos = self.by_username[username]
+        u = self.users[pos]
+        entry = (_name_key(u), pos)
+        old = self.by_role.get(u.get('role') or 'user', [])
+        i = bisect.bisect_left(old, entry)
+        if i < len(old) and old[i] == entry:
+            del old[i]
+        bisect.insort(self.by_role.setdefault(new_role or 'user', []), entry)
+        u['role'] = new_role
+
+    def set_pending(self, username, flag):
+        pos = self.by_username[username]
+        self.users[pos]['upgrade_requested'] = flag
+        if flag:
+            self.pending.add(pos)
+        else:
+            self.pending.discard(pos)
+
+    def matching(self, query='', role=None):
+        """
+        Sortierte Einträge [(username klein, position)] passend zu Suche/Rolle.
+        Ohne Suchtext wird die vorhandene sortierte Liste direkt zurückgegeben (Seiten kosten O(Seitengröße)),
+        mit Suchtext: Präfix-Bereiche auf Name und E-Mail per bisect, O(log n + Treffer).
+        """
+        entries = self.by_role.get(role, []) if role else self.sorted_names
+        query = (query or '').strip().lower()
+        if not query:
+            return entries
+        positions = {pos for _key, pos in _prefix_range(self.sorted_names, query)}
+        positions.update(pos for _key, pos in _prefix_range(self.sorted_emails, query))
+        if role:
+            positions = {pos for pos in positions if (self.users[pos].get('role') or 'user') == role}
+        return sorted((_name_key(self.users[pos]), pos) for pos in positions)
+
+def _name_key(u):
+    return (u.get('username') or '').lower()
+
+def _prefix_range(entries, prefix):
+    # Ausschnitt einer sortierten [(text, position)]-Liste, deren Text mit prefix beginnt
+    lo = bisect.bisect_left(entries, (prefix,))
+    hi = bisect.bisect_left(entries, (prefix + '\U0010ffff',))
+    return entries[lo:hi]
+
+def _users_table():
+    # liefert die (gecachte) User-Tabelle inkl. Index für accounts.json
+    _ensure_file()  # stelle sicher, dass Datei existiert
+    return _load_cached(_DATA_FILE, _UsersTable)
+
+def _persist_users_table(table):
+    # schreibt den aktuellen Stand und behält Tabelle + Index im Cache
+    _check_writable(table, _DATA_FILE)
+    _write_json_list(_DATA_FILE, table.users)
+    _remember(_DATA_FILE, table)
 
 def load_users():
     # liest die gesamte Liste von Usern aus der JSON-Datei zurück
-    _ensure_file()  # stelle sicher, dass Datei existiert
-    try:
-        with open(_DATA_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)  # lade JSON-Inhalt
-            return data if isinstance(data, list) else []  # falls Datei kaputt -> leere Liste
-    except Exception:
-        return []  # bei Fehlern einfach leere Liste zurückgeben
+    return list(_users_table().users)  # Kopie, damit append() o.ä. den Cache nicht verändert
 
 def save_users(users):
-    # schreibt die komplette User-Liste in die JSON-Datei (einfach, ohne atomare Operationen)
-    with open(_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)  # überschreibe Datei
+    # schreibt die komplette User-Liste in die JSON-Datei (atomar, unter Sperre)
+    with _users_write_lock:
+        _write_json_list(_DATA_FILE, users)
+        _remember(_DATA_FILE, _UsersTable(users))
 
 def add_user(userobj):
     """
     Fügt das gegebene userobj ans Ende der Liste an.
-    Keine Duplikatprüfung, kein Hashing — minimal und unsicher.
-    """
-    users = load_users()  # lade aktuelle Liste
-    # speichere username, email, password, role und upgrade_requested (kein upgrade_target)
-    users.append({
-        'username': userobj.get('username'),
-        'email': userobj.get('email'),
-        'password': userobj.get('password'),
-        'role': userobj.get('role', 'user'),  # Rolle, default 'user'
-        'upgrade_requested': userobj.get('upgrade_requested', False),  # Anfrage-Flag
-        # upgrade_target entfernt
-    })
-    save_users(users)
+    Doppelte Benutzernamen/E-Mails werden über den Index abgelehnt:
+    Rückgabe (False, 'username exists') bzw. (False, 'email exists').
+    Das Passwort wird als PBKDF2-Hash gespeichert (siehe passwords.py).
+    """
+    # erst ohne Sperre prüfen: für vorhandene Namen/E-Mails wird kein PBKDF2-Hash berechnet
+    error = _user_conflict(_users_table(), userobj)
+    if error:
+        return False, error
+    password = passwords.hash_password(userobj.get('password') or '')  # teuer -> außerhalb der Sperre
+    with _users_write_lock:
+        table = _users_table()  # lade aktuelle Tabelle (meist aus dem Cache)
+        error = _user_conflict(table, userobj)  # erneut: inzwischen parallel angelegt?
+        if error:
+            return False, error
+        # speichere username, email, password, role und upgrade_requested (kein upgrade_target)
+        table.append({
+            'username': userobj.get('username'),
+            'email': userobj.get('email'),
+            'password': password,
+            'role': userobj.get('role', 'user'),  # Rolle, default 'user'
+            'upgrade_requested': userobj.get('upgrade_requested', False),  # Anfrage-Flag
+            # upgrade_target entfernt
+        })
+        _persist_users_table(table)
     return True, None  # Erfolg
 
-def find_user(username):
-    # suche ersten User mit gegebenem Benutzernamen (oder None)
-    users = load_users()
-    for u in users:
-        if u.get('username') == username:
-            return u
+def _user_conflict(table, userobj):
+    # 'username exists' / 'email exists', wenn userobj so nicht angelegt werden kann, sonst None
+    if table.get(userobj.get('username')) is not None:
+        return 'username exists'
+    if table.email_taken(userobj.get('email')):
+        return 'email exists'
     return None
 
+def find_user(username):
+    # suche User mit gegebenem Benutzernamen über den Index (oder None)
+    return _users_table().get(username)
+
+def find_user_by_email(email):
+    # suche User über die (klein geschriebene) E-Mail-Adresse (oder None)
+    table = _users_table()
+    pos = table.by_email.get((email or '').strip().lower())
+    return table.users[pos] if pos is not None else None
+
+def users_version():
+    """
+    Versionsstand der Nutzerdaten: ändert sich bei jeder Änderung von accounts.json (auch durch
+    andere Prozesse). Damit können Aufrufer (z.B. die Middleware) Rollen zwischenspeichern.
+    """
+    return _safe_signature(_DATA_FILE)
+
+def pending_upgrades():
+    # alle Nutzer mit offener Upgrade-Anfrage (über den Index, O(Anzahl Anfragen)), sortiert nach username
+    table = _users_table()
+    return [table.users[pos] for _name, pos in sorted((_name_key(table.users[pos]), pos) for pos in table.pending)]
+
+def search_users(query='', role=None, page=1, per_page=50):
+    """
+    Eine Seite der Nutzerliste für Admins, sortiert nach username:
+    {'users': [...], 'page': 1, 'per_page': 50, 'total': <int>, 'has_next': <bool>}
+    query: Präfix von username oder E-Mail (Groß-/Kleinschreibung egal), role: nur Nutzer mit dieser Rolle.
+    """
+    page = max(int(page), 1)
+    table = _users_table()
+    entries = table.matching(query, role)
+    start = (page - 1) * per_page
+    return {
+        'users': [table.users[pos] for _name, pos in entries[start:start + per_page]],
+        'page': page,
+        'per_page': per_page,
+        'total': len(entries),
+        'has_next': start + per_page < len(entries),
+    }
+
 def authenticate(username, password):
-    # sehr einfache Authentifizierung: vergleiche Klartext-Passwort
+    # prüft das Passwort gegen den gespeicherten Hash; Klartext-Altbestand wird beim Login auf einen Hash umgestellt
     user = find_user(username)
     if not user:
+        passwords.verify_dummy(password)  # gleiche Antwortzeit wie bei bekannten Nutzern
         return None
-    if user.get('password') == password:
-        # gib ein kleines Objekt zurück (inkl. role und upgrade_requested), kein upgrade_target
-        return {
-            'username': user.get('username'),
-            'email': user.get('email'),
-            'role': user.get('role', 'user'),
-            'upgrade_requested': user.get('upgrade_requested', False),
-        }
-    return None
+    ok, needs_rehash = passwords.verify(password, user.get('password'))
+    if not ok:
+        return None
+    if needs_rehash:
+        _rehash_password(username, user.get('password'), password)
+    # gib ein kleines Objekt zurück (inkl. role und upgrade_requested), kein upgrade_target
+    return {
+        'username': user.get('username'),
+        'email': user.get('email'),
+        'role': user.get('role', 'user'),
+        'upgrade_requested': user.get('upgrade_requested', False),
+    }
+
+def _rehash_password(username, old_stored, raw):
+    # speichert einen neuen Hash, sofern sich das Passwort seit der Prüfung nicht geändert hat
+    new_stored = passwords.hash_password(raw)  # teuer -> außerhalb der Sperre
+    try:
+        with _users_write_lock:
+            table = _users_table()
+            u = table.get(username)
+            if u is None or u.get('password') != old_stored:
+                return
+            u['password'] = new_stored
+            _persist_users_table(table)
+    except (OSError, RuntimeError):
+        pass  # Login klappt trotzdem; beim nächsten Login wird es erneut versucht
+
+async def aauthenticate(username, password):
+    # wie authenticate (auch für das SQLite-Backend), die teure Prüfung läuft aber im Passwort-Thread-Pool
+    return await passwords.run_in_pool(authenticate, username, password)
 
 # neu: Funktion, die die Rolle eines Nutzers in der JSON-Datei ändert
 def update_user_role(username, new_role):
-    # lade alle Nutzer (liest accounts.json)
-    users = load_users()
-    changed = False  # Flag, ob wir eine Änderung vorgenommen haben
-    for u in users:
-        if u.get('username') == username:
-            u['role'] = new_role  # setze das role-Feld auf den neuen Wert
-            changed = True
-            break
-    if changed:
-        save_users(users)  # speichere die aktualisierte Liste zurück in die Datei
-        return True  # Änderung erfolgreich
-    return False  # Benutzer nicht gefunden -> keine Änderung
+    with _users_write_lock:
+        table = _users_table()
+        u = table.get(username)  # O(1) über den Index
+        if u is None:
+            return False  # Benutzer nicht gefunden -> keine Änderung
+        table.set_role(username, new_role)  # setze das role-Feld auf den neuen Wert (inkl. Rollen-Index)
+        _persist_users_table(table)  # speichere die aktualisierte Liste zurück in die Datei
+    return True  # Änderung erfolgreich
 
 # neu: Funktion, die die Upgrade-Anfrage eines Nutzers in der JSON-Datei setzt
 def request_upgrade(username):
@@ -92,24 +581,20 @@ def request_upgrade(username):
     - kein upgrade_target wird gespeichert
     Gibt True zurück bei erfolgreicher Markierung, sonst False.
     """
-    users = load_users()
-    changed = False
-    for u in users:
-        if u.get('username') == username:
-            role = u.get('role', 'user')
-            # Admins dürfen keine Anfrage stellen
-            if role == 'admin':
-                return False
-            # falls bereits angefragt, nichts tun
-            if u.get('upgrade_requested'):
-                return False
-            u['upgrade_requested'] = True  # nur Flag setzen
-            changed = True
-            break
-    if changed:
-        save_users(users)
-        return True
-    return False
+    with _users_write_lock:
+        table = _users_table()
+        u = table.get(username)
+        if u is None:
+            return False
+        # Admins dürfen keine Anfrage stellen
+        if u.get('role', 'user') == 'admin':
+            return False
+        # falls bereits angefragt, nichts tun
+        if u.get('upgrade_requested'):
+            return False
+        table.set_pending(username, True)  # nur Flag setzen
+        _persist_users_table(table)
+    return True
 
 def accept_upgrade(username):
     """
@@ -117,43 +602,36 @@ def accept_upgrade(username):
       user -> vip, vip -> admin, sonst keine Änderung.
     Setze role auf Ziel und lösche upgrade_requested.
     """
-    users = load_users()
-    changed = False
-    for u in users:
-        if u.get('username') == username:
-            current = u.get('role', 'user')
-            if current == 'user':
-                new_role = 'vip'
-            elif current == 'vip':
-                new_role = 'admin'
-            else:
-                # falls already admin oder unbekannt, nichts tun
-                return False
-            u['role'] = new_role  # setze neue Rolle
-            u['upgrade_requested'] = False  # clear request flag
-            changed = True
-            break
-    if changed:
-        save_users(users)
-        return True
-    return False
+    with _users_write_lock:
+        table = _users_table()
+        u = table.get(username)
+        if u is None:
+            return False
+        current = u.get('role', 'user')
+        if current == 'user':
+            new_role = 'vip'
+        elif current == 'vip':
+            new_role = 'admin'
+        else:
+            # falls already admin oder unbekannt, nichts tun
+            return False
+        table.set_role(username, new_role)  # setze neue Rolle
+        table.set_pending(username, False)  # clear request flag
+        _persist_users_table(table)
+    return True
 
 def deny_upgrade(username):
     """
     Admin lehnt ab: setze upgrade_requested False.
     """
-    users = load_users()
-    changed = False
-    for u in users:
-        if u.get('username') == username:
-            if u.get('upgrade_requested'):
-                u['upgrade_requested'] = False
-                changed = True
-            break
-    if changed:
-        save_users(users)
-        return True
-    return False
+    with _users_write_lock:
+        table = _users_table()
+        u = table.get(username)
+        if u is None or not u.get('upgrade_requested'):
+            return False
+        table.set_pending(username, False)
+        _persist_users_table(table)
+    return True
 
 """
 /////////////////work_reports.json/////////////////
@@ -161,40 +639,579 @@ def deny_upgrade(username):
 
 # Pfad zur JSON-Datei für Arbeitsberichte im Projektverzeichnis
 _REPORTS_FILE = os.path.join(str(settings.BASE_DIR), 'work_reports.json')  # speichert alle Arbeitsberichte
+# Journal (JSON-Lines) für das Backend 'journal' daneben: work_reports.journal.jsonl (siehe _ReportStore);
+# work_reports.json dient dann als Snapshot
+# Layout 'sharded': Shard-Dateien <nnnn>.json (+ <nnnn>.journal.jsonl) und layout.json in diesem Verzeichnis
+_SHARD_DIR = os.path.join(str(settings.BASE_DIR), 'work_reports')
+_SHARD_NAME = re.compile(r'\d{4}\.json')
 
-def _ensure_reports_file():
-    # sorgt dafür, dass die Datei für Reports existiert
-    dirpath = os.path.dirname(_REPORTS_FILE) or '.'
-    os.makedirs(dirpath, exist_ok=True)  # erstelle Verzeichnis falls nötig
-    if not os.path.exists(_REPORTS_FILE):
-        with open(_REPORTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f)  # lege leere Liste als JSON an
+def _reports_backend():
+    # Schalter in settings.py: 'json' (ganze Datei neu schreiben) oder 'journal' (Änderungen anhängen)
+    return getattr(settings, 'ACCOUNTS_REPORTS_BACKEND', 'json')
 
-def load_reports():
-    # liest alle Arbeitsberichte aus work_reports.json
-    _ensure_reports_file()  # stelle sicher, dass Datei existiert
+def _reports_layout():
+    # Schalter in settings.py: 'single' (alle Reports in work_reports.json) oder 'sharded' (siehe _store_for)
+    return getattr(settings, 'ACCOUNTS_REPORTS_LAYOUT', 'single')
+
+class _ReportStore:
+    """
+    Eine Report-Datei mit ihrem Journal und ihrer Schreibsperre: work_reports.json im Layout
+    'single' bzw. ein Shard im Layout 'sharded'. Tabelle, Cache-Eintrag und Sperre gibt es pro Store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + '.journal.jsonl'
+        # serialisiert Lese-Ändern-Schreiben auf Datei + Journal (Threads und Prozesse)
+        self.lock = _FileLock(path)
+
+_main_store = _ReportStore(_REPORTS_FILE)
+
+_shard_stores = {}  # pfad -> _ReportStore (eine Sperre pro Shard-Datei und Prozess)
+_shard_stores_lock = threading.Lock()
+_shard_counts = {}  # verzeichnis -> anzahl shards (aus layout.json, einmal pro Prozess gelesen)
+
+def _shard_count(directory=None):
+    """
+    Anzahl Shards laut <verzeichnis>/layout.json. Fehlt die Datei (neue Installation), wird sie mit
+    ACCOUNTS_REPORTS_SHARDS angelegt. Danach ist die Zahl fest, weil sie bestimmt, in welchem Shard ein
+    Nutzer liegt; neu verteilen geht nur über manage.py shard_reports (bei gestopptem Server).
+    """
+    directory = directory or _SHARD_DIR  # erst beim Aufruf auflösen (Tests setzen _SHARD_DIR um)
+    count = _shard_counts.get(directory)
+    if count is not None:
+        return count
+    path = os.path.join(directory, 'layout.json')
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        _write_layout(directory, int(getattr(settings, 'ACCOUNTS_REPORTS_SHARDS', 64)))
+    with open(path, encoding='utf-8') as f:
+        count = int(json.load(f)['shards'])
+    _shard_counts[directory] = count
+    return count
+
+def _write_layout(directory, shards):
+    # legt layout.json an, ohne eine vorhandene (z.B. parallel angelegte) zu überschreiben
+    _link_new_file(os.path.join(directory, 'layout.json'), json.dumps({'shards': shards}).encode('utf-8'))
+
+def _shard_index(username, shards):
+    # crc32 statt hash(): gleiches Ergebnis in jedem Prozess und nach Neustarts
+    return zlib.crc32(str(username).encode('utf-8')) % shards
+
+def _shard_file(index, directory=None):
+    return os.path.join(directory or _SHARD_DIR, f'{index:04d}.json')
+
+def _store_at(path):
+    with _shard_stores_lock:
+        store = _shard_stores.get(path)
+        if store is None:
+            store = _shard_stores[path] = _ReportStore(path)
+        return store
+
+def _store_for(username):
+    # Store mit den Reports des Nutzers: im Layout 'sharded' genau ein Shard, sonst work_reports.json
+    if _reports_layout() != 'sharded':
+        return _main_store
+    return _store_at(_shard_file(_shard_index(username, _shard_count())))
+
+def _all_stores(directory=None):
+    # alle vorhandenen Report-Dateien in fester Reihenfolge (nutzerübergreifende Auswertungen, Kompaktierung)
+    if directory is None:
+        if _reports_layout() != 'sharded':
+            return [_main_store]
+        directory = _SHARD_DIR
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [_store_at(os.path.join(directory, name)) for name in sorted(names) if _SHARD_NAME.fullmatch(name)]
+
+class _ReportsTable:
+    """
+    Reports im Speicher plus Index username -> Positionen in slots.
+    Gelöschte Reports bleiben als None-Slot stehen, damit sich die Positionen
+    anderer Nutzer nicht verschieben; sind zu viele Slots leer, wird neu aufgebaut.
+    """
+
+    damaged = False  # True, wenn work_reports.json beim Laden nicht lesbar war
+    assigned_ids = False  # True, wenn Reports ohne ID (Altbestand) beim Laden eine ID bekommen haben
+
+    def __init__(self, reports, store=None):
+        self.store = store or _main_store  # Datei, aus der die Tabelle stammt und in die sie geschrieben wird
+        # Änderungen im Speicher (_apply_report_record) und Leser, die Index + slots zusammen lesen, halten
+        # mutex; nur kurz (keine Datei-Zugriffe), Leser warten also nicht auf das Schreiben der Datei
+        self.mutex = threading.RLock()
+        self._rebuild(reports)
+        self.snapshot_crc = None  # crc32 von work_reports.json, auf dem dieser Stand aufbaut
+        self.journal_offset = 0   # bis hierhin ist das Journal eingespielt
+
+    def _rebuild(self, reports):
+        self.slots = []  # Reports in Datei-Reihenfolge (None = gelöscht)
+        self.by_user = {}  # username -> [Position, ...] (aufsteigend)
+        self.module_totals = {}  # username -> {modul: [minuten, anzahl reports]} (laufend mitgeführt)
+        self.by_user_date = {}  # username -> sortierte Liste [(datum, position), ...] für Bereichsabfragen
+        self.by_id = {}  # Report-ID -> Position
+        self.by_user_key = {}  # username -> {(datum, modul, text): anzahl} für Duplikat-Prüfung beim Merge-Import
+        # nutzerübergreifende Summen für die Admin-Auswertung, je [minuten, anzahl reports]
+        self.user_totals = {}  # username -> [...]
+        self.org_module_totals = {}  # modul -> [...]
+        self.org_week_totals = {}  # ISO-Woche ('2026-W02') -> [...]
+        # Volltext-Index username -> {wort: {positionen}} über module + content; wird pro Nutzer
+        # erst bei der ersten Suche aufgebaut und danach bei jeder Änderung mitgeführt
+        self.by_token = {}
+        self.live = 0  # Anzahl nicht gelöschter Reports
+        for r in reports:
+            self.append(r, insert=list.append)
+        # einmal pro Nutzer sortieren statt bei jedem Report einfügen
+        for entries in self.by_user_date.values():
+            entries.sort()
+
+    def reports(self):
+        # alle Reports ohne gelöschte Slots (Datei-Reihenfolge)
+        with self.mutex:
+            return [r for r in self.slots if r is not None]
+
+    def positions_for_user(self, username):
+        return self.by_user.get(username, [])
+
+    def for_user(self, username):
+        # O(Anzahl Reports des Nutzers)
+        with self.mutex:
+            return self.reports_at(self.positions_for_user(username))
+
+    def reports_at(self, positions):
+        # Reports zu Positionen, gelöschte Slots übersprungen (unter mutex aufrufen)
+        slots = self.slots
+        return [slots[pos] for pos in positions if slots[pos] is not None]
+
+    def module_minutes(self, username):
+        # {modul: minuten} des Nutzers aus den mitgeführten Summen, O(Anzahl Module)
+        with self.mutex:
+            return {mod: entry[0] for mod, entry in self.module_totals.get(username, {}).items()}
+
+    def totals(self):
+        # Kopien der nutzerübergreifenden Summen (Nutzer, Module, Wochen) für organisation_summary
+        with self.mutex:
+            return (
+                {key: list(v) for key, v in self.user_totals.items()},
+                {key: list(v) for key, v in self.org_module_totals.items()},
+                {key: list(v) for key, v in self.org_week_totals.items()},
+            )
+
+    def positions_in_range(self, username, date_from=None, date_to=None):
+        # Positionen mit date_from <= datum <= date_to (Grenzen inklusive, None = offen), nach Datum sortiert
+        entries = self.by_user_date.get(username, [])
+        lo = bisect.bisect_left(entries, (date_from,)) if date_from else 0
+        hi = bisect.bisect_right(entries, (date_to, float('inf'))) if date_to else len(entries)
+        return [pos for _date, pos in entries[lo:hi]]
+
+    def page_for_user(self, username, offset, limit):
+        # Positionen absteigend nach Datum (neueste zuerst), Ausschnitt offset..offset+limit: O(limit)
+        entries = self.by_user_date.get(username, [])
+        end = max(len(entries) - offset, 0)
+        start = max(end - limit, 0)
+        return [pos for _date, pos in reversed(entries[start:end])]
+
+    def _count(self, report, sign):
+        # addiert (sign=1) bzw. subtrahiert (sign=-1) einen Report in den Modul-Summen
+        username = report.get('username')
+        mod = report.get('module') or 'unknown'  # Modul-Name, fallback 'unknown'
+        minutes = _minutes_of(report)
+        modules = self.module_totals.setdefault(username, {})
+        entry = modules.setdefault(mod, [0, 0])
+        entry[0] += sign * minutes
+        entry[1] += sign
+        if entry[1] <= 0:
+            del modules[mod]  # kein Report mehr in diesem Modul -> taucht nicht mehr in der Summary auf
+            if not modules:
+                del self.module_totals[username]
+        _add_total(self.user_totals, username, minutes, sign)
+        _add_total(self.org_module_totals, mod, minutes, sign)
+        _add_total(self.org_week_totals, _week_of(str(report.get('date', ''))), minutes, sign)
+
+    def position_of(self, report_id):
+        # Position zu einer Report-ID (oder None), O(1)
+        return self.by_id.get(report_id)
+
+    def has_key(self, username, key):
+        # gibt es beim Nutzer schon einen Report mit gleichem (datum, modul, text)? O(1)
+        return key in self.by_user_key.get(username, {})
+
+    def _count_key(self, report, sign):
+        username = report.get('username')
+        keys = self.by_user_key.setdefault(username, {})
+        key = _dedupe_key(report)
+        keys[key] = keys.get(key, 0) + sign
+        if keys[key] <= 0:
+            del keys[key]
+            if not keys:
+                del self.by_user_key[username]
+
+    def append(self, report, insert=bisect.insort):
+        if not report.get('id'):
+            report['id'] = _new_report_id()  # Altbestand ohne ID -> wird beim nächsten Schreiben gespeichert
+            self.assigned_ids = True
+        self.slots.append(report)  # zuerst: jede Position in einem Index zeigt auf einen vorhandenen Slot
+        pos = len(self.slots) - 1
+        self.by_id[report['id']] = pos
+        self.by_user.setdefault(report.get('username'), []).append(pos)
+        insert(self.by_user_date.setdefault(report.get('username'), []), (str(report.get('date', '')), pos))
+        self.live += 1
+        self._count(report, 1)
+        self._count_key(report, 1)
+        tokens = self.by_token.get(report.get('username'))
+        if tokens is not None:
+            for token in _report_tokens(report):
+                tokens.setdefault(token, set()).add(pos)
+
+    def remove(self, username, positions):
+        # entfernt die gegebenen Positionen (alle gehören zu username)
+        if not positions:
+            return
+        drop = set(positions)
+        by_date = self.by_user_date.get(username, [])
+        for pos in drop:
+            report = self.slots[pos]
+            self.by_id.pop(report.get('id'), None)
+            self._count(report, -1)
+            self._count_key(report, -1)
+            tokens = self.by_token.get(username)
+            if tokens is not None:
+                for token in _report_tokens(report):
+                    tokens[token].discard(pos)
+                    if not tokens[token]:
+                        del tokens[token]
+            del by_date[bisect.bisect_left(by_date, (str(report.get('date', '')), pos))]
+            self.slots[pos] = None
+        if not by_date:
+            self.by_user_date.pop(username, None)
+        remaining = [pos for pos in self.positions_for_user(username) if pos not in drop]
+        if remaining:
+            self.by_user[username] = remaining
+        else:
+            self.by_user.pop(username, None)
+        self.live -= len(drop)
+        self._maybe_compact()
+
+    def has_token_index(self, username):
+        return username in self.by_token
+
+    def build_token_index(self, username):
+        # einmaliger Aufbau für einen Nutzer, O(Anzahl seiner Reports); danach pflegen append/remove den Index
+        with self.mutex:
+            tokens = {}
+            for pos in self.positions_for_user(username):
+                for token in _report_tokens(self.slots[pos]):
+                    tokens.setdefault(token, set()).add(pos)
+            self.by_token[username] = tokens
+
+    def search_positions(self, username, query):
+        # Positionen, deren module/content alle Wörter der Suche enthalten, neueste zuerst (unter mutex aufrufen)
+        words = _tokens(query)
+        tokens = self.by_token.get(username, {})
+        if not words:
+            return []
+        candidates = sorted((tokens.get(word, set()) for word in words), key=len)
+        matches = set(candidates[0]).intersection(*candidates[1:])  # beginnt mit der kleinsten Menge
+        slots = self.slots
+        return [pos for _date, pos in sorted(
+            ((str(slots[pos].get('date', '')), pos) for pos in matches if slots[pos] is not None), reverse=True)]
+
+    def _maybe_compact(self):
+        # räumt leere Slots auf, sobald sie mehr als die Hälfte ausmachen (amortisiert O(1) pro Löschung)
+        dead = len(self.slots) - self.live
+        if dead > 1024 and dead > self.live:
+            self._rebuild(self.reports())
+
+def _new_report_id():
+    # stabile, global eindeutige Report-ID (auch über mehrere Prozesse ohne gemeinsamen Zähler)
+    return uuid.uuid4().hex
+
+def _dedupe_key(report):
+    # Vergleichsschlüssel für den Merge-Import: gleiches Datum, Modul und Text gilt als derselbe Report
+    return (str(report.get('date', '')), report.get('module') or '', report.get('content') or '')
+
+_TOKEN_RE = re.compile(r'[^\W_]+')  # Wörter aus Buchstaben/Ziffern (wie der unicode61-Tokenizer von SQLite FTS5)
+
+def _tokens(text):
+    # Suchwörter eines Textes, klein geschrieben
+    return set(_TOKEN_RE.findall(str(text or '').lower()))
+
+def _report_tokens(report):
+    return _tokens(report.get('module')) | _tokens(report.get('content'))
+
+def _add_total(totals, key, minutes, sign):
+    # pflegt einen Eintrag [minuten, anzahl] in totals; leere Einträge verschwinden
+    entry = totals.setdefault(key, [0, 0])
+    entry[0] += sign * minutes
+    entry[1] += sign
+    if entry[1] <= 0:
+        del totals[key]
+
+@functools.lru_cache(maxsize=4096)
+def _week_of(date_str):
+    # ISO-Woche eines Datums; gecacht, weil viele Reports dasselbe Datum haben
+    return _period_key(date_str, 'week')
+
+def _minutes_of(report):
     try:
-        with open(_REPORTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)  # lade JSON-Inhalt
-            return data if isinstance(data, list) else []  # falls Datei kaputt -> leere Liste
+        return int(report.get('minutes', 0))  # Minuten als int
     except Exception:
-        return []  # bei Fehlern einfach leere Liste zurückgeben
+        return 0
+
+def _safe_signature(path):
+    try:
+        return _file_signature(path)
+    except OSError:
+        return None  # Datei existiert (noch) nicht
+
+def _load_reports_table(store=_main_store):
+    # Snapshot lesen und ein evtl. vorhandenes, passendes Journal einspielen
+    data, crc, ok = _read_snapshot(store.path)
+    with metrics.timed('storage_index'):
+        table = _ReportsTable(data, store)
+    table.snapshot_crc = crc
+    table.damaged = not ok
+    records, offset = _read_journal(store, crc)
+    if records is not None:
+        with metrics.timed('storage_index'):
+            for record in records:
+                _apply_report_record(table, record)
+        table.journal_offset = offset
+    return table
+
+def _read_journal(store, snapshot_crc, offset=0):
+    # journal.read() mit Messung für den Request (gelesene Bytes = Zuwachs des Offsets)
+    started = time.perf_counter()
+    records, new_offset = journal.read(store.journal_path, snapshot_crc, offset)
+    metrics.record('storage_read', time.perf_counter() - started, max(new_offset - offset, 0))
+    return records, new_offset
+
+def _reports_table(store):
+    """
+    Wie _cached_reports_table(store). Haben Reports aus dem Altbestand beim Laden erst eine ID bekommen,
+    wird der Stand einmalig (unter Sperre) gespeichert, damit die IDs ab sofort stabil sind.
+    """
+    table = _cached_reports_table(store)
+    if table.assigned_ids and not table.damaged:
+        with store.lock:
+            table = _cached_reports_table(store)  # unter Sperre neu prüfen (anderer Prozess evtl. schneller)
+            if table.assigned_ids and not table.damaged:
+                _persist_reports_table(table)
+                table.assigned_ids = False
+    if _pending_reports:
+        # Write-Behind: wer die Schreibsperre hält, schreibt die offenen Reports zuerst (Reihenfolge wie
+        # ohne Warteschlange); alle anderen sehen sie nur im Speicher (read-your-writes)
+        if store.lock.held():
+            _drain_pending_reports(table)
+        else:
+            _overlay_pending_reports(table)
+    return table
+
+def _cached_reports_table(store):
+    """
+    Liefert die (gecachte) Tabelle inkl. Index für eine Report-Datei (+ Journal).
+    Die Cache-Signatur umfasst Snapshot und Journal. Ist nur das Journal gewachsen
+    (z.B. durch einen anderen Prozess), werden lediglich die neuen Zeilen eingespielt.
+    """
+    _create_if_missing(store.path)  # stelle sicher, dass Datei existiert
+    if not _cache_enabled():
+        return _load_reports_table(store)
+    entry, hit = _cache_lookup(store.path, _reports_signature(store))
+    if hit:
+        return entry['data']
+    # Neuladen nur unter der Thread-Sperre dieser Datei: Leser anderer Dateien (accounts.json, andere
+    # Shards) und Cache-Treffer warten nicht, gleichzeitige Leser derselben Datei laden sie nur einmal.
+    # Dieselbe Sperre hält ein Schreiber von journal.append() bis zum Setzen von journal_offset, ein
+    # Leser spielt also nie eine Zeile nach, die der Schreiber selbst schon angewendet hat
+    with store.lock.in_process():
+        sig = _reports_signature(store)
+        entry, hit = _cache_lookup(store.path, sig)
+        if hit:
+            return entry['data']
+        if entry is not None and sig[1] is not None and entry['sig'][0] == sig[0]:
+            old_journal = entry['sig'][1]
+            table = entry['data']
+            # gleicher Snapshot, gleiches Journal (Inode), nur gewachsen -> Rest einspielen
+            if old_journal is not None and old_journal[2] == sig[1][2] and sig[1][1] >= table.journal_offset:
+                records, offset = _read_journal(store, table.snapshot_crc, table.journal_offset)
+                if records is not None:
+                    for record in records:
+                        _apply_report_record(table, record)
+                    table.journal_offset = offset
+                    with _cache_lock:
+                        _cache_stats['hits'] += 1
+                        _cache_stats['journal_tail_reads'] = _cache_stats.get('journal_tail_reads', 0) + 1
+                    _cache_store(store.path, sig, table, entry)
+                    return table
+        with _cache_lock:
+            _cache_stats['misses'] += 1
+        table = _load_reports_table(store)
+        _cache_store(store.path, sig, table, entry)
+        return table
+
+def _reports_signature(store):
+    # Cache-Signatur einer Report-Datei: Snapshot und Journal
+    return (_safe_signature(store.path), _safe_signature(store.journal_path))
+
+def _remember_reports_table(table):
+    store = table.store
+    _remember(store.path, table, _reports_signature(store))
+
+def _persist_reports_table(table):
+    """
+    Schreibt den kompletten Stand als neuen Snapshot und behält Tabelle + Index im Cache.
+    Reihenfolge ist wichtig: erst Snapshot, dann Journal neu anlegen/löschen. Stirbt der
+    Prozess dazwischen, passt die CRC im alten Journal nicht mehr und es wird ignoriert.
+    """
+    store = table.store
+    _check_writable(table, store.path)
+    table.snapshot_crc = _write_json_list(store.path, table.reports())
+    if _reports_backend() == 'journal':
+        table.journal_offset = journal.start(store.journal_path, table.snapshot_crc)
+    else:
+        journal.remove(store.journal_path)
+        table.journal_offset = 0
+    _remember_reports_table(table)
+
+def _commit_report_change(table, record):
+    # speichert eine bereits auf table angewendete Änderung: JSON -> ganze Datei, Journal -> eine Zeile
+    if _reports_backend() != 'journal':
+        _persist_reports_table(table)
+        return
+    store = table.store
+    _check_writable(table, store.path)
+    # Anhängen und neuen Offset setzen in einem Abschnitt mit dem Journal-Nachspielen der Leser
+    # (_cached_reports_table); Aufrufer halten store.lock ohnehin, die Sperre ist reentrant
+    with store.lock.in_process():
+        try:
+            if table.journal_offset == 0:
+                # noch kein (gültiges) Journal zu diesem Snapshot -> anlegen
+                table.journal_offset = journal.start(store.journal_path, table.snapshot_crc)
+            started = time.perf_counter()
+            offset = journal.append(store.journal_path, record)
+            _record_write(offset - table.journal_offset, time.perf_counter() - started)
+            table.journal_offset = offset
+        except Exception:
+            _forget(store.path)  # Speicherstand ist schon verändert -> beim nächsten Lesen neu laden
+            raise
+        _remember_reports_table(table)
+    _maybe_compact_journal(store, table.journal_offset)
+
+def _matching_positions(table, username, minutes, date_str, module, content):
+    # nur die Reports des Nutzers vergleichen (Index statt Scan über alle Reports)
+    return [pos for pos in table.positions_for_user(username) if (
+        str(table.slots[pos].get('minutes')) == str(minutes) and
+        str(table.slots[pos].get('date')) == str(date_str) and
+        table.slots[pos].get('module') == module and
+        table.slots[pos].get('content') == content
+    )]
+
+def _apply_report_record(table, record):
+    """
+    Wendet eine Änderung auf die Tabelle an. Wird sowohl für neue Änderungen als auch
+    beim Einspielen des Journals benutzt, damit beides garantiert gleich wirkt.
+    """
+    with table.mutex:  # Leser sehen die Änderung ganz oder gar nicht
+        _apply_locked(table, record)
+
+def _apply_locked(table, record):
+    op = record.get('op')
+    if op == 'add':
+        if table.position_of(record['report'].get('id')) is None:  # schon vorhanden -> nicht doppelt anlegen
+            table.append(record['report'])
+    elif op == 'delete_id':
+        pos = table.position_of(record.get('id'))
+        if pos is not None and table.slots[pos].get('username') == record.get('username'):
+            table.remove(record.get('username'), [pos])
+    elif op == 'delete':
+        username = record.get('username')
+        table.remove(username, _matching_positions(
+            table, username, record.get('minutes'), record.get('date'), record.get('module'), record.get('content')))
+    elif op == 'replace_user':
+        username = record.get('username')
+        table.remove(username, list(table.positions_for_user(username)))
+        for r in record.get('reports', []):
+            if table.position_of(r.get('id')) is None:
+                table.append(r)
+    elif op == 'append_user':
+        # Duplikate wurden schon vor dem Schreiben aussortiert -> hier nur anhängen (bekannte IDs überspringen)
+        for r in record.get('reports', []):
+            if table.position_of(r.get('id')) is None:
+                table.append(r)
+    elif op == 'add_batch':
+        # Write-Behind: neue Reports (auch verschiedener Nutzer) in einem Eintrag; was im Speicher
+        # schon sichtbar ist (gleiche ID), wird nicht doppelt angelegt
+        for r in record.get('reports', []):
+            if table.position_of(r.get('id')) is None:
+                table.append(r)
+
+def load_reports():
+    # liest alle Arbeitsberichte (work_reports.json bzw. alle Shards)
+    return list(iter_all_reports())  # neue Liste, damit append() o.ä. den Cache nicht verändert
+
+def iter_all_reports():
+    """
+    Generator über alle Reports aller Nutzer (Admin-Auswertungen, Export, Migration).
+    Im Layout 'sharded' wird Shard für Shard gelesen (erst beim Weiterlaufen des Generators) und
+    über den Cache, ein weiterer Durchlauf parst also nur Shards, die sich seitdem geändert haben.
+    """
+    return _iter_json_reports()
+
+def _iter_json_reports():
+    # eigener Name, damit import_json_storage die JSON-Dateien auch mit ACCOUNTS_STORAGE_BACKEND = 'sqlite' liest
+    for store in _all_stores():
+        yield from _reports_table(store).reports()
 
 def save_reports(reports):
-    # schreibt die komplette Reports-Liste in die JSON-Datei (einfach, ohne atomare Operationen)
-    with open(_REPORTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(reports, f, ensure_ascii=False, indent=2)  # überschreibe Datei
+    """
+    Schreibt die komplette Reports-Liste (atomar pro Datei, unter Sperre). Im Layout 'sharded'
+    landet jeder Report im Shard seines Nutzers; Shards ohne Reports werden geleert.
+    """
+    if _reports_layout() != 'sharded':
+        _replace_store(_main_store, reports)
+        return
+    by_path = {}
+    for r in reports:
+        by_path.setdefault(_store_for(r.get('username')).path, []).append(r)
+    for store in _all_stores():
+        by_path.setdefault(store.path, [])
+    for path, shard_reports in sorted(by_path.items()):
+        _replace_store(_store_at(path), shard_reports)
+
+def _replace_store(store, reports):
+    with store.lock:
+        _create_if_missing(store.path)
+        if _pending_reports:
+            _reports_table(store)  # offene Reports vorher schreiben -> werden wie ohne Write-Behind ersetzt
+        _persist_reports_table(_ReportsTable(reports, store))
 
 def delete_reports(username, minutes, date_str, module, content):
-    reports = load_reports()
-    new_reports = [r for r in reports if not (
-        r.get('username') == username and
-        str(r.get('minutes')) == str(minutes) and
-        str(r.get('date')) == str(date_str) and
-        r.get('module') == module and
-        r.get('content') == content
-    )]
-    save_reports(new_reports)
+    record = {'op': 'delete', 'username': username, 'minutes': minutes,
+              'date': str(date_str), 'module': module, 'content': content}
+    store = _store_for(username)  # nur der Shard des Nutzers wird gelesen und geschrieben
+    with store.lock:
+        table = _reports_table(store)
+        if not _matching_positions(table, username, minutes, date_str, module, content):
+            return  # nichts zu löschen -> nichts schreiben
+        _apply_report_record(table, record)
+        _commit_report_change(table, record)
+
+def delete_report_by_id(username, report_id):
+    """
+    Löscht genau einen Report über seine ID (O(1) über den ID-Index, kein Textvergleich).
+    Nur Reports des gegebenen username; Rückgabe True, wenn etwas gelöscht wurde.
+    """
+    record = {'op': 'delete_id', 'username': username, 'id': report_id}
+    store = _store_for(username)
+    with store.lock:
+        table = _reports_table(store)
+        pos = table.position_of(report_id)
+        if pos is None or table.slots[pos].get('username') != username:
+            return False  # unbekannte ID oder Report eines anderen Nutzers
+        _apply_report_record(table, record)
+        _commit_report_change(table, record)
+    return True
 
 def add_report(username, minutes, date_str, module, content):
     """
@@ -205,26 +1222,247 @@ def add_report(username, minutes, date_str, module, content):
     - module: Modulbezeichnung
     - content: kurzer Berichtstext
     """
-    reports = load_reports()  # lade aktuelle Liste
     # einfaches Report-Objekt, keine Validierung (wie gewünscht minimal)
     report = {
+        'id': _new_report_id(),     # stabile ID (für reports/delete/<id>/)
         'username': username,       # Besitzer des Berichts
         'minutes': int(minutes),    # gearbeitete Minuten
         'date': str(date_str),      # Datum als String
         'module': module,           # Modul-Name
         'content': content,         # Berichtstext
     }
-    reports.append(report)         # füge Bericht ans Ende der Liste an
-    save_reports(reports)          # speichere aktualisierte Liste
+    if _write_behind_enabled():
+        _enqueue_report(report)  # wird vom Writer-Thread zusammen mit anderen geschrieben
+        return True
+    record = {'op': 'add', 'report': report}
+    store = _store_for(username)               # Layout 'sharded': nur der Shard des Nutzers
+    with store.lock:
+        table = _reports_table(store)          # lade aktuelle Tabelle (meist aus dem Cache)
+        _apply_report_record(table, record)    # füge Bericht ans Ende an, Index wird mitgeführt
+        _commit_report_change(table, record)   # speichere (ganze Datei oder eine Journal-Zeile)
     return True
 
+"""
+/////////////////Write-Behind für add_report/////////////////
+"""
+
+# Mit ACCOUNTS_REPORTS_WRITE_BEHIND legt add_report den Report nur in eine Warteschlange und kehrt
+# sofort zurück. Ein Writer-Thread pro Prozess schreibt alle wartenden Reports gemeinsam: nach
+# ACCOUNTS_REPORTS_WRITE_BEHIND_SECONDS oder sobald ACCOUNTS_REPORTS_WRITE_BEHIND_BATCH Reports
+# warten, mit EINEM Schreibvorgang (JSON: eine neue Datei, Journal: eine Zeile 'add_batch').
+# N gleichzeitige Reports kosten so nicht mehr N komplette Neuschreibungen der Datei.
+# - Lesen in diesem Prozess sieht wartende Reports sofort (sie werden in die Tabelle im Speicher
+#   eingefügt); andere Prozesse sehen sie erst nach dem Schreiben.
+# - Jede andere Änderung unter der Schreibsperre einer Datei schreibt zuerst die wartenden Reports
+#   dieser Datei (siehe _reports_table). Im Layout 'sharded' gibt es einen Schreibvorgang pro Shard.
+# - Beim Beenden des Prozesses (atexit) wird die Warteschlange geleert. Bei einem harten Absturz
+#   gehen höchstens die Reports des letzten Intervalls verloren.
+
+_pending_reports = []  # (store, report), noch nicht geschrieben (älteste zuerst)
+_pending_cond = threading.Condition()  # schützt _pending_reports, weckt den Writer-Thread
+_writer = None
+_writer_pid = None  # nach fork() hat der Kindprozess keinen Writer-Thread -> neu starten
+_writer_stopping = False
+
+def _write_behind_enabled():
+    return getattr(settings, 'ACCOUNTS_REPORTS_WRITE_BEHIND', False)
+
+def _enqueue_report(report):
+    global _writer, _writer_pid
+    store = _store_for(report['username'])
+    with _pending_cond:
+        _pending_reports.append((store, report))
+        waiting = len(_pending_reports)
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = threading.Thread(target=_writer_loop, name='reports-write-behind', daemon=True)
+            _writer_pid = os.getpid()
+            _writer.start()
+        if waiting >= getattr(settings, 'ACCOUNTS_REPORTS_WRITE_BEHIND_BATCH', 500):
+            _pending_cond.notify()
+    if waiting >= getattr(settings, 'ACCOUNTS_REPORTS_WRITE_BEHIND_MAX', 10000):
+        flush_reports()  # Writer kommt nicht hinterher (z.B. Schreibfehler) -> selbst schreiben statt endlos puffern
+
+def _overlay_pending_reports(table):
+    # macht wartende Reports in der Tabelle im Speicher sichtbar, ohne zu schreiben
+    with table.store.lock.in_process():  # nicht gleichzeitig mit einem Schreiber ändern
+        # erst unter der Sperre auswählen: sonst könnte ein Schreiber die Warteschlange inzwischen
+        # geschrieben und einen der Reports schon wieder gelöscht haben -> er käme zurück
+        with _pending_cond:
+            missing = [r for s, r in _pending_reports if s is table.store and table.position_of(r['id']) is None]
+        if missing:
+            _apply_report_record(table, {'op': 'add_batch', 'reports': missing})
+
+def _drain_pending_reports(table):
+    # schreibt die wartenden Reports dieser Datei mit einem Schreibvorgang (nur unter table.store.lock aufrufen)
+    with _pending_cond:
+        reports = [r for s, r in _pending_reports if s is table.store]
+    if not reports:
+        return 0
+    record = {'op': 'add_batch', 'reports': reports}
+    _apply_report_record(table, record)
+    _commit_report_change(table, record)
+    written = {r['id'] for r in reports}
+    with _pending_cond:
+        # erst nach erfolgreichem Schreiben entfernen
+        _pending_reports[:] = [(s, r) for s, r in _pending_reports if s is not table.store or r['id'] not in written]
+    return len(reports)
+
+def flush_reports():
+    """
+    Schreibt alle wartenden Reports sofort (z.B. vor einem Backup oder in Tests).
+    Rückgabe: Anzahl geschriebener Reports (0 ohne Write-Behind).
+    """
+    with _pending_cond:
+        stores = list(dict.fromkeys(s for s, _r in _pending_reports))
+    written = 0
+    for store in stores:
+        with store.lock:
+            written += _drain_pending_reports(_cached_reports_table(store))
+    return written
+
+def _writer_loop():
+    # sammelt Reports bis zum Intervall bzw. zur Batch-Größe und schreibt sie dann gemeinsam
+    while True:
+        with _pending_cond:
+            while not _pending_reports and not _writer_stopping:
+                _pending_cond.wait()
+            if _writer_stopping:
+                return  # Rest schreibt _shutdown_writer
+            deadline = time.monotonic() + getattr(settings, 'ACCOUNTS_REPORTS_WRITE_BEHIND_SECONDS', 0.05)
+            batch = getattr(settings, 'ACCOUNTS_REPORTS_WRITE_BEHIND_BATCH', 500)
+            while len(_pending_reports) < batch and not _writer_stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                _pending_cond.wait(remaining)
+        try:
+            flush_reports()
+        except Exception:
+            # Reports bleiben in der Warteschlange und werden beim nächsten Durchlauf erneut geschrieben
+            logging.getLogger(__name__).exception('write-behind: writing %d report(s) failed', len(_pending_reports))
+            time.sleep(getattr(settings, 'ACCOUNTS_REPORTS_WRITE_BEHIND_SECONDS', 0.05) or 0.05)
+
+@atexit.register
+def _shutdown_writer():
+    # beim Beenden des Prozesses: Writer stoppen und die Warteschlange selbst leeren
+    global _writer_stopping
+    with _pending_cond:
+        _writer_stopping = True
+        _pending_cond.notify_all()
+    flush_reports()
+
+"""
+/////////////////Journal-Kompaktierung/////////////////
+"""
+
+_compaction_lock = threading.Lock()  # verhindert mehrere gleichzeitige Hintergrund-Kompaktierungen
+
+def compact_reports():
+    """
+    Faltet das Journal in einen neuen Snapshot (work_reports.json bzw. jeden Shard) und beginnt ein
+    leeres Journal. Kann jederzeit aufgerufen werden (manage.py compact_reports); Rückgabe: Anzahl Reports.
+    """
+    return sum(_compact_store(store) for store in _all_stores())
+
+def _compact_store(store):
+    with store.lock:
+        table = _reports_table(store)
+        _persist_reports_table(table)
+        return table.live
+
+def _maybe_compact_journal(store, journal_size):
+    # startet eine Kompaktierung im Hintergrund, sobald das Journal die Schwelle aus settings.py überschreitet
+    limit = getattr(settings, 'ACCOUNTS_JOURNAL_COMPACT_BYTES', 8 * 1024 * 1024)
+    if not limit or journal_size < limit or not _compaction_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            _compact_store(store)  # nur die Datei, deren Journal zu groß ist
+        finally:
+            _compaction_lock.release()
+
+    threading.Thread(target=run, name='reports-journal-compaction', daemon=True).start()
+
 def get_reports_for_user(username):
-    # gibt alle Reports zurück, die zum gegebenen username gehören
-    reports = load_reports()
-    return [r for r in reports if r.get('username') == username]
+    # gibt alle Reports zurück, die zum gegebenen username gehören (über den Index)
+    return _reports_table(_store_for(username)).for_user(username)
 
 # neu: Fasse Berichte pro Modul zusammen und berechne Prozentsatz der Gesamtzeit
-def summarize_reports(username):
+def get_reports_in_range(username, date_from=None, date_to=None):
+    """
+    Reports des Nutzers mit date_from <= date <= date_to, aufsteigend nach Datum.
+    Datumswerte als ISO-Strings ('2026-01-10'); Grenzen sind inklusive, None = offen.
+    Über den nach Datum sortierten Index: O(log n + Anzahl Treffer).
+    """
+    table = _reports_table(_store_for(username))
+    with table.mutex:
+        return table.reports_at(table.positions_in_range(username, date_from, date_to))
+
+def iter_reports_for_user(username, date_from=None, date_to=None):
+    """
+    Generator über die Reports des Nutzers (ohne Zeitraum in Speicher-Reihenfolge, mit Zeitraum
+    nach Datum sortiert) für Streaming-Exporte: es wird keine zweite Liste der Reports aufgebaut.
+    Während des Exports gelöschte Reports werden übersprungen.
+    """
+    table = _reports_table(_store_for(username))
+    with table.mutex:
+        slots = table.slots  # bleibt gültig, auch wenn die Tabelle währenddessen neu aufgebaut wird
+        if date_from or date_to:
+            positions = table.positions_in_range(username, date_from, date_to)
+        else:
+            positions = list(table.positions_for_user(username))
+    for pos in positions:
+        report = slots[pos]
+        if report is not None:
+            yield report
+
+def get_reports_page(username, page=1, per_page=50):
+    """
+    Eine Seite der Reports des Nutzers, absteigend nach Datum (neueste zuerst):
+    {'reports': [...], 'page': 1, 'per_page': 50, 'total': <int>, 'has_next': <bool>}
+    Kostet O(per_page) statt alle Reports des Nutzers zu laden.
+    """
+    page = max(int(page), 1)
+    table = _reports_table(_store_for(username))
+    with table.mutex:
+        total = len(table.positions_for_user(username))
+        reports = table.reports_at(table.page_for_user(username, (page - 1) * per_page, per_page))
+    return {
+        'reports': reports,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'has_next': page * per_page < total,
+    }
+
+def search_reports(username, query, page=1, per_page=50):
+    """
+    Volltextsuche in module und content der Reports des Nutzers: alle Wörter aus query müssen
+    vorkommen (ganze Wörter, Groß-/Kleinschreibung egal). Neueste zuerst, Format wie get_reports_page.
+    Über den invertierten Index kostet eine Suche etwa O(Anzahl Treffer) statt eines Scans aller Reports.
+    """
+    page = max(int(page), 1)
+    store = _store_for(username)
+    table = _reports_table(store)
+    if not table.has_token_index(username):
+        with store.lock:
+            table = _reports_table(store)  # unter Sperre, damit keine gleichzeitige Änderung verloren geht
+            if not table.has_token_index(username):
+                table.build_token_index(username)
+    start = (page - 1) * per_page
+    with table.mutex:
+        positions = table.search_positions(username, query)
+        reports = table.reports_at(positions[start:start + per_page])
+    return {
+        'reports': reports,
+        'page': page,
+        'per_page': per_page,
+        'total': len(positions),
+        'has_next': start + per_page < len(positions),
+    }
+
+def summarize_reports(username, date_from=None, date_to=None):
     """
     Liefert eine Zusammenfassung der Arbeitszeit des Benutzers:
     {
@@ -234,17 +1472,55 @@ def summarize_reports(username):
          ...
       ]
     }
+    Optional nur für den Zeitraum date_from..date_to (siehe get_reports_in_range).
     """
-    reports = get_reports_for_user(username)  # lade alle Reports des Nutzers
-    totals = {}  # sammle Minuten pro Modul
-    for r in reports:
-        mod = (r.get('module') or 'unknown')  # Modul-Name, fallback 'unknown'
-        try:
-            mins = int(r.get('minutes', 0))  # Minuten als int
-        except Exception:
-            mins = 0
-        totals[mod] = totals.get(mod, 0) + mins  # aufsummieren
+    if date_from or date_to:
+        totals = {}  # sammle Minuten pro Modul im Zeitraum
+        for r in get_reports_in_range(username, date_from, date_to):
+            mod = (r.get('module') or 'unknown')  # Modul-Name, fallback 'unknown'
+            totals[mod] = totals.get(mod, 0) + _minutes_of(r)
+        return _summary_from_totals(totals)
+    # Minuten pro Modul werden von add_report/delete_reports/overwrite_user_reports laufend
+    # mitgeführt -> hier kein Durchlauf über die Reports mehr
+    return _summary_from_totals(_reports_table(_store_for(username)).module_minutes(username))
+
+# erlaubte Werte für period in rollup_reports
+ROLLUP_PERIODS = ('day', 'week', 'month')
+
+def _period_key(date_str, period):
+    # '2026-01-08' -> '2026-01-08' (day), '2026-W02' (week, ISO-Woche), '2026-01' (month)
+    try:
+        day = datetime.date.fromisoformat(str(date_str))
+    except ValueError:
+        return 'unknown'  # kein gültiges Datum
+    if period == 'day':
+        return day.isoformat()
+    if period == 'week':
+        year, week, _weekday = day.isocalendar()
+        return f'{year}-W{week:02d}'
+    return f'{day.year}-{day.month:02d}'
 
+def _rollup_from_days(day_totals, period):
+    # faltet [(datum, minuten, anzahl), ...] (nach Datum sortiert) zu Perioden zusammen
+    rollup = {}
+    for date_str, minutes, count in day_totals:
+        entry = rollup.setdefault(_period_key(date_str, period), {'minutes': 0, 'count': 0})
+        entry['minutes'] += minutes
+        entry['count'] += count
+    return [{'period': key, 'minutes': v['minutes'], 'count': v['count']} for key, v in rollup.items()]
+
+def rollup_reports(username, period='month', date_from=None, date_to=None):
+    """
+    Minuten pro Tag/Woche/Monat (period: 'day' | 'week' | 'month'), aufsteigend:
+    [{'period': '2026-01', 'minutes': 120, 'count': 3}, ...]
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f'unknown period: {period}')
+    days = [(r.get('date', ''), _minutes_of(r), 1) for r in get_reports_in_range(username, date_from, date_to)]
+    return _rollup_from_days(days, period)
+
+def _summary_from_totals(totals):
+    # baut aus {modul: minuten} die Zusammenfassung mit Prozentangaben (siehe summarize_reports)
     total_all = sum(totals.values())  # gesamte Minuten aller Module
 
     # Baue die Liste mit Prozentangaben
@@ -265,25 +1541,296 @@ def summarize_reports(username):
         'by_module': by_module,
     }
 
+def _ranked(totals, key_name):
+    # {key: [minuten, anzahl]} -> Liste absteigend nach Minuten
+    rows = [{key_name: key, 'minutes': mins, 'count': count} for key, (mins, count) in totals.items()]
+    rows.sort(key=lambda x: x['minutes'], reverse=True)
+    return rows
+
+def _organisation_summary(by_user, by_module, by_week):
+    # gemeinsames Ergebnisformat für organisation_summary (JSON- und SQLite-Backend)
+    total_minutes = sum(mins for mins, _count in by_user.values())
+    modules = _ranked(by_module, 'module')
+    for row in modules:
+        row['percent'] = round(row['minutes'] / total_minutes * 100, 2) if total_minutes else 0
+    return {
+        'total_minutes': total_minutes,
+        'total_reports': sum(count for _mins, count in by_user.values()),
+        'by_user': _ranked(by_user, 'username'),
+        'by_module': modules,
+        'by_week': [{'period': week, 'minutes': mins, 'count': count} for week, (mins, count) in sorted(by_week.items())],
+    }
+
+def organisation_summary():
+    """
+    Nutzerübergreifende Auswertung für Admins:
+    {'total_minutes': <int>, 'total_reports': <int>,
+     'by_user':   [{'username': ..., 'minutes': ..., 'count': ...}, ...]   (absteigend nach Minuten)
+     'by_module': [{'module': ..., 'minutes': ..., 'count': ..., 'percent': ...}, ...]
+     'by_week':   [{'period': '2026-W02', 'minutes': ..., 'count': ...}, ...]  (aufsteigend)}
+    Die Summen werden bei jeder Änderung (und beim Laden/Journal-Einspielen) in der Tabelle
+    mitgeführt; hier wird nur sortiert (im Layout 'sharded' vorher über die Shards addiert).
+    """
+    stores = _all_stores()
+    if len(stores) == 1:
+        return _organisation_summary(*_reports_table(stores[0]).totals())
+    by_user, by_module, by_week = {}, {}, {}
+    for store in stores:
+        # gecacht: die Summen jedes Shards werden nur nach Änderungen neu gebaut
+        shard_users, shard_modules, shard_weeks = _reports_table(store).totals()
+        by_user.update(shard_users)  # ein Nutzer liegt in genau einem Shard
+        for totals, merged in ((shard_modules, by_module), (shard_weeks, by_week)):
+            for key, (mins, count) in totals.items():
+                entry = merged.setdefault(key, [0, 0])
+                entry[0] += mins
+                entry[1] += count
+    return _organisation_summary(by_user, by_module, by_week)
+
+def _normalize_import(username, r):
+    # stelle sicher, dass jedes neue Report-Objekt den username und eine eigene ID enthält;
+    # Kopie, damit übergebene dicts (z.B. gecachte Reports aus get_reports_for_user) unverändert bleiben
+    r = dict(r)
+    r['id'] = _new_report_id()
+    r['username'] = username
+    # minimal: stelle sicher, dass minutes ganzzahlig ist
+    try:
+        r['minutes'] = int(r.get('minutes', 0))
+    except Exception:
+        r['minutes'] = 0
+    r['date'] = str(r.get('date', ''))
+    r['module'] = r.get('module', '')
+    r['content'] = r.get('content', '')
+    return r
+
 def overwrite_user_reports(username, new_reports):
     """
     Ersetzt alle Reports des gegebenen username mit new_reports.
-    new_reports: Liste von dicts mit keys: minutes, date, module, content (username wird gesetzt).
-    """
-    reports = load_reports()  # lade alle existierenden Reports
-    # entferne vorhandene Reports des Users
-    reports = [r for r in reports if r.get('username') != username]
-    # stelle sicher, dass jedes neue Report-Objekt den username enthält
-    for r in new_reports:
-        r['username'] = username
-        # minimal: stelle sicher, dass minutes ganzzahlig ist
-        try:
-            r['minutes'] = int(r.get('minutes', 0))
-        except Exception:
-            r['minutes'] = 0
-        r['date'] = str(r.get('date', ''))
-        r['module'] = r.get('module', '')
-        r['content'] = r.get('content', '')
-        reports.append(r)
-    save_reports(reports)  # speichere die kombinierte Liste zurück
+    new_reports: Liste oder Iterator (z.B. Streaming-Import) von dicts mit keys: minutes, date, module, content
+    (username und id werden gesetzt). Wird genau einmal durchlaufen und in einem Schreibvorgang gespeichert.
+    """
+    reports = [_normalize_import(username, r) for r in new_reports]
+    record = {'op': 'replace_user', 'username': username, 'reports': reports}
+    store = _store_for(username)
+    with store.lock:
+        table = _reports_table(store)  # lade alle existierenden Reports (des Shards)
+        # entferne vorhandene Reports des Users (nur dessen Positionen) und hänge die neuen an
+        _apply_report_record(table, record)
+        _commit_report_change(table, record)  # speichere die kombinierte Liste zurück
     return True
+
+def append_user_reports(username, new_reports, merge=False):
+    """
+    Hängt new_reports an die vorhandenen Reports des Nutzers an (Import-Modus 'append').
+    Mit merge=True (Modus 'merge') werden Reports übersprungen, die es beim Nutzer mit gleichem
+    Datum, Modul und Text schon gibt (auch innerhalb von new_reports). Die Prüfung läuft über den
+    Schlüssel-Index der Tabelle, kostet also O(Anzahl neuer Reports) statt eines Vergleichs mit der ganzen Historie.
+    Rückgabe: Anzahl tatsächlich hinzugefügter Reports.
+    """
+    reports = [_normalize_import(username, r) for r in new_reports]
+    store = _store_for(username)
+    with store.lock:
+        table = _reports_table(store)
+        if merge:
+            seen = set()
+            unique = []
+            for r in reports:
+                key = _dedupe_key(r)
+                if key in seen or table.has_key(username, key):
+                    continue
+                seen.add(key)
+                unique.append(r)
+            reports = unique
+        if not reports:
+            return 0  # nichts Neues -> nichts schreiben
+        record = {'op': 'append_user', 'username': username, 'reports': reports}
+        _apply_report_record(table, record)
+        _commit_report_change(table, record)  # Journal: eine Zeile nur mit den neuen Reports
+    return len(reports)
+
+"""
+/////////////////Layout 'sharded' (Migration)/////////////////
+"""
+
+# Im Layout 'sharded' (ACCOUNTS_REPORTS_LAYOUT) liegen die Reports in work_reports/<nnnn>.json, jeder
+# Nutzer in genau einem Shard (crc32(username) % Anzahl Shards, siehe _store_for). Änderungen eines
+# Nutzers lesen und schreiben nur seinen Shard und sperren nur diesen; andere Nutzer warten nicht.
+# Umstellen bzw. zurück geht mit manage.py shard_reports (Server vorher stoppen).
+
+def split_reports_into_shards(shards, force=False):
+    """
+    Verteilt work_reports.json (inkl. Journal) auf <shards> Shard-Dateien in work_reports/.
+    Die Shards werden in einem temporären Verzeichnis geschrieben und erst am Ende per Rename
+    übernommen; work_reports.json bleibt als Backup unverändert. Ein vorhandenes work_reports/
+    wird nur mit force ersetzt (und als work_reports.old-<zeit> aufgehoben). Rückgabe: Anzahl Reports.
+    """
+    shards = int(shards)
+    if shards < 1:
+        raise ValueError('shards must be >= 1')
+    if os.path.exists(_SHARD_DIR) and not force:
+        raise ValueError(f'{_SHARD_DIR} already exists')
+    with _main_store.lock:
+        table = _reports_table(_main_store)  # inkl. Journal und noch wartender Reports (Write-Behind)
+        if table.damaged:
+            raise ValueError(f'{_main_store.path} is damaged')
+        by_shard = {}
+        for r in table.reports():
+            by_shard.setdefault(_shard_index(r.get('username'), shards), []).append(r)
+        tmp = tempfile.mkdtemp(dir=str(settings.BASE_DIR), prefix='work_reports.')
+        os.chmod(tmp, 0o777 & ~_UMASK)  # mkdtemp legt das Verzeichnis nur für den Besitzer lesbar an
+        for index, reports in by_shard.items():
+            _write_json_list(_shard_file(index, tmp), reports)
+        _write_layout(tmp, shards)
+        if os.path.exists(_SHARD_DIR):
+            os.replace(_SHARD_DIR, f'{_SHARD_DIR}.old-{time.strftime("%Y%m%d%H%M%S")}')
+        os.replace(tmp, _SHARD_DIR)
+    _forget_shards()
+    return table.live
+
+def merge_report_shards():
+    """
+    Gegenrichtung zu split_reports_into_shards: schreibt alle Shards aus work_reports/ wieder in
+    work_reports.json (Layout 'single'). Die Shards bleiben liegen. Rückgabe: Anzahl Reports.
+    """
+    reports = []
+    for store in _all_stores(_SHARD_DIR):
+        with store.lock:
+            table = _load_reports_table(store)
+            if table.damaged:
+                raise ValueError(f'{store.path} is damaged')
+            reports.extend(table.reports())
+    _replace_store(_main_store, reports)
+    return len(reports)
+
+def _forget_shards():
+    # nach einer Migration: Anzahl Shards und gecachte Shard-Tabellen neu lesen
+    _shard_counts.clear()
+    with _shard_stores_lock:
+        paths = list(_shard_stores)
+    for path in paths:
+        _forget(path)
+
+"""
+/////////////////Async-API (async Views unter ASGI)/////////////////
+"""
+
+# Blockierende Datei-/Datenbankzugriffe laufen in einem eigenen, begrenzten Thread-Pool
+# (ACCOUNTS_STORAGE_WORKERS). Die Event-Loop wartet nur auf das Ergebnis, ein Request belegt also
+# keinen Thread, solange er nicht gerade liest oder schreibt. Muss eine Datei neu geladen werden
+# (Cache veraltet), lädt sie nur der erste Leser; alle anderen Leser derselben Event-Loop warten
+# auf diesen einen Ladevorgang und lesen danach aus dem Cache (kein paralleles Parsen derselben Datei).
+# Die Funktionen rufen die öffentlichen Funktionen über ihren Namen auf und funktionieren daher
+# auch mit dem SQLite-Backend (dort gibt es nichts vorzuladen).
+
+_io_executor = None
+_io_executor_lock = threading.Lock()
+_loading = {}  # (event-loop, pfad) -> laufender Ladevorgang (asyncio.Future)
+
+def _io_pool():
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is None:
+            workers = getattr(settings, 'ACCOUNTS_STORAGE_WORKERS', 4)
+            _io_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='accounts-storage')
+        return _io_executor
+
+async def arun(fn, *args, **kwargs):
+    # fn(*args, **kwargs) im Storage-Pool ausführen; der Kontext (z.B. Zeitmessung des Requests) wird übernommen
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_io_pool(), call)
+
+def _load_source(name, username=None):
+    # Datei, die vor dem Lesen aktuell im Cache sein soll: accounts.json bzw. die Report-Datei des
+    # Nutzers (work_reports.json oder sein Shard); None = nichts vorzuladen
+    if getattr(settings, 'ACCOUNTS_STORAGE_BACKEND', 'json') == 'sqlite' or not _cache_enabled():
+        return None  # nichts zu laden bzw. ohne Cache liest ohnehin jeder Aufruf selbst
+    if name == 'users':
+        return _DATA_FILE
+    if username is None and _reports_layout() == 'sharded':
+        return None  # nutzerübergreifend: iter_all_reports liest die Shards ohnehin einzeln
+    return _store_for(username)
+
+def _needs_load(source):
+    # True, wenn die Datei seit dem letzten Laden geändert wurde; nur os.stat, kein Warten auf _cache_lock
+    if isinstance(source, _ReportStore):
+        path, sig = source.path, _reports_signature(source)
+    else:
+        path, sig = source, _safe_signature(source)
+    entry = _cache.get(path)
+    return entry is None or entry['sig'] != sig
+
+def _preload(source):
+    if isinstance(source, _ReportStore):
+        _reports_table(source)
+    else:
+        _users_table()
+
+async def _loaded(name, username=None):
+    # wartet, bis die Datei im Cache aktuell ist; gleichzeitige Aufrufe teilen sich einen Ladevorgang
+    source = _load_source(name, username)
+    if source is None:
+        return
+    loop = asyncio.get_running_loop()
+    key = (loop, getattr(source, 'path', source))  # Futures gehören zu genau einer Event-Loop
+    pending = _loading.get(key)
+    if pending is None and _needs_load(source):
+        pending = _loading[key] = asyncio.ensure_future(arun(_preload, source))
+        pending.add_done_callback(lambda _f: _loading.pop(key, None))
+    if pending is not None:
+        await asyncio.wait({pending})  # Fehler beim Laden zeigen sich gleich im eigentlichen Aufruf
+
+async def aread(name, fn, *args, **kwargs):
+    """
+    Wie arun(), aber für Lesezugriffe auf 'users' (accounts.json) oder 'reports' (work_reports.json):
+    muss die Datei neu geladen werden, passiert das für alle gleichzeitigen Leser nur einmal.
+    """
+    await _loaded(name)
+    return await arun(fn, *args, **kwargs)
+
+async def _aread_reports(fn, username, *args):
+    # wie aread('reports', ...), lädt aber nur die Report-Datei des Nutzers vor (Layout 'sharded': sein Shard)
+    await _loaded('reports', username)
+    return await arun(fn, username, *args)
+
+async def aget_reports_page(username, page=1, per_page=50):
+    return await _aread_reports(get_reports_page, username, page, per_page)
+
+async def asearch_reports(username, query, page=1, per_page=50):
+    return await _aread_reports(search_reports, username, query, page, per_page)
+
+async def asummarize_reports(username, date_from=None, date_to=None):
+    return await _aread_reports(summarize_reports, username, date_from, date_to)
+
+async def arollup_reports(username, period='month', date_from=None, date_to=None):
+    return await _aread_reports(rollup_reports, username, period, date_from, date_to)
+
+async def aadd_report(username, minutes, date_str, module, content):
+    return await arun(add_report, username, minutes, date_str, module, content)
+
+async def aoverwrite_user_reports(username, new_reports):
+    # new_reports darf ein Generator sein (z.B. imports.iter_reports); er wird im Pool-Thread gelesen
+    return await arun(overwrite_user_reports, username, new_reports)
+
+async def aappend_user_reports(username, new_reports, merge=False):
+    return await arun(append_user_reports, username, new_reports, merge)
+
+async def aiter_chunks(name, iterable, username=None):
+    """
+    Async-Generator über einen blockierenden Iterator (z.B. exports.iter_csv(iter_reports_for_user(...))):
+    jedes next() läuft im Storage-Pool. Für StreamingHttpResponse unter ASGI, die einen normalen
+    Iterator sonst erst komplett in eine Liste lesen würde. username: vorgeladen wird nur dessen Report-Datei.
+    """
+    await _loaded(name, username)
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        chunk = await arun(next, iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+# Alternatives Backend: mit ACCOUNTS_STORAGE_BACKEND = 'sqlite' werden die öffentlichen Funktionen
+# dieses Moduls durch die SQLite-Variante ersetzt (gleiche Signaturen, siehe sqlite_storage.py).
+# Der Schalter wird beim Import gelesen.
+if getattr(settings, 'ACCOUNTS_STORAGE_BACKEND', 'json') == 'sqlite':
+    from .sqlite_storage import *  # noqa: E402,F401,F403
@@ -0,0 +1,521 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from accounts import exports, imports, metrics, storage
+
+
+@override_settings(ACCOUNTS_STORAGE_BACKEND='json', ACCOUNTS_REPORTS_BACKEND='json', ACCOUNTS_REPORTS_LAYOUT='single',
+                   ACCOUNTS_STORAGE_CACHE=True)
+class StorageTestCase(SimpleTestCase):
+    # Report-Dateien in einem temporären Verzeichnis statt in BASE_DIR
+
+    def setUp(self):
+        self.tmp = tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        store = storage._ReportStore(os.path.join(tmp, 'work_reports.json'))
+        patcher = mock.patch.object(storage, '_main_store', store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        storage.clear_cache()
+        self.addCleanup(storage.clear_cache)
+
+
+@override_settings(ACCOUNTS_REPORTS_WRITE_BEHIND=True, ACCOUNTS_REPORTS_WRITE_BEHIND_SECONDS=0.001)
+class WriteBehindTests(StorageTestCase):
+
+    def tearDown(self):
+        storage.flush_reports()
+
+    def test_read_sees_pending_report(self):
+        storage.add_report('alice', 10, '2026-01-01', 'M', 'pending')
+        self.assertEqual([r['content'] for r in storage.get_reports_for_user('alice')], ['pending'])
+        storage.flush_reports()
+        storage.clear_cache()
+        self.assertEqual([r['content'] for r in storage.get_reports_for_user('alice')], ['pending'])
+
+    def test_concurrent_delete_and_read_do_not_resurrect_reports(self):
+        # gelöschte Reports dürfen nicht über die Überlagerung wartender Reports zurückkommen
+        adds_per_thread, threads = 150, 4
+        deleted = []
+        stop = threading.Event()
+        errors = []
+
+        def adder(n):
+            for i in range(adds_per_thread):
+                storage.add_report('alice', 1, '2026-01-01', 'M', f'{n}-{i}')
+                time.sleep(0.001)  # mehrere Writer-Durchläufe, dazwischen lesen und löschen
+
+        def deleter():
+            while not stop.is_set():
+                reports = storage.get_reports_for_user('alice')
+                if reports and storage.delete_report_by_id('alice', reports[0]['id']):
+                    deleted.append(reports[0]['id'])
+
+        def reader():
+            while not stop.is_set():
+                storage.get_reports_page('alice')
+
+        def run(fn, *args):
+            try:
+                fn(*args)
+            except Exception as exc:  # Fehler im Thread im Test sichtbar machen
+                errors.append(exc)
+
+        adders = [threading.Thread(target=run, args=(adder, n)) for n in range(threads)]
+        others = [threading.Thread(target=run, args=(fn,)) for fn in (deleter, deleter, reader, reader)]
+        for t in adders + others:
+            t.start()
+        for t in adders:
+            t.join()
+        stop.set()
+        for t in others:
+            t.join()
+
+        self.assertEqual(errors, [])
+        storage.flush_reports()
+        expected = adds_per_thread * threads - len(deleted)
+        self.assertEqual(len(storage.get_reports_for_user('alice')), expected)
+        storage.clear_cache()
+        ids = {r['id'] for r in storage.get_reports_for_user('alice')}
+        self.assertEqual(len(ids), expected)
+        self.assertFalse(ids & set(deleted))
+
+
+class SnapshotTests(StorageTestCase):
+
+    def _add_five(self):
+        for i in range(5):
+            storage.add_report('alice', 10, f'2026-01-0{i + 1}', 'M', f'r{i}')
+        storage.clear_cache()
+
+    def _failing_open(self):
+        # Lesefehler (z.B. EIO) nur für work_reports.json
+        path, real_open = storage._main_store.path, open
+
+        def fake_open(file, mode='r', *args, **kwargs):
+            if file == path and 'r' in mode:
+                raise OSError(5, 'Input/output error')
+            return real_open(file, mode, *args, **kwargs)
+        return mock.patch('builtins.open', fake_open)
+
+    def _assert_read_error_keeps_data(self):
+        self._add_five()
+        with self._failing_open():
+            with self.assertRaises(OSError):
+                storage.add_report('alice', 10, '2026-02-01', 'M', 'new')
+        storage.clear_cache()
+        self.assertEqual(len(storage.get_reports_for_user('alice')), 5)
+
+    def test_read_error_does_not_overwrite_reports(self):
+        self._assert_read_error_keeps_data()
+
+    @override_settings(ACCOUNTS_REPORTS_BACKEND='journal')
+    def test_read_error_does_not_overwrite_reports_journal(self):
+        self._assert_read_error_keeps_data()
+
+    def test_damaged_file_is_not_overwritten(self):
+        with open(storage._main_store.path, 'w', encoding='utf-8') as f:
+            f.write('[{"id": "x", "username": "alice"')  # abgeschnitten
+        self.assertEqual(storage.get_reports_for_user('alice'), [])
+        with self.assertRaises(RuntimeError):
+            storage.add_report('alice', 10, '2026-01-01', 'M', 'new')
+        with open(storage._main_store.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '[{"id": "x", "username": "alice"')
+
+
+class ReportIdTests(StorageTestCase):
+
+    def test_delete_by_id_only_for_owner(self):
+        storage.add_report('alice', 10, '2026-01-01', 'M', 'a')
+        storage.add_report('alice', 20, '2026-01-01', 'M', 'a')  # gleicher Inhalt, eigene ID
+        storage.add_report('bob', 30, '2026-01-01', 'M', 'b')
+        first, second = storage.get_reports_for_user('alice')
+        self.assertNotEqual(first['id'], second['id'])
+        self.assertFalse(storage.delete_report_by_id('bob', first['id']))
+        self.assertFalse(storage.delete_report_by_id('alice', 'unknown'))
+        self.assertTrue(storage.delete_report_by_id('alice', first['id']))
+        self.assertFalse(storage.delete_report_by_id('alice', first['id']))
+        storage.clear_cache()
+        self.assertEqual([r['id'] for r in storage.get_reports_for_user('alice')], [second['id']])
+        self.assertEqual(len(storage.get_reports_for_user('bob')), 1)
+
+
+class SearchTests(StorageTestCase):
+
+    def test_search_matches_all_words_newest_first(self):
+        storage.add_report('alice', 10, '2026-01-01', 'Backend', 'Fix login bug')
+        storage.add_report('alice', 10, '2026-01-03', 'Frontend', 'login page')
+        storage.add_report('alice', 10, '2026-01-02', 'Backend', 'login tests')
+        storage.add_report('bob', 10, '2026-01-02', 'Backend', 'login')
+        page = storage.search_reports('alice', 'LOGIN')
+        self.assertEqual([r['date'] for r in page['reports']], ['2026-01-03', '2026-01-02', '2026-01-01'])
+        self.assertEqual(page['total'], 3)
+        page = storage.search_reports('alice', 'backend login')
+        self.assertEqual(sorted(r['content'] for r in page['reports']), ['Fix login bug', 'login tests'])
+        self.assertEqual(storage.search_reports('alice', '')['total'], 0)
+
+    def test_search_index_follows_changes(self):
+        storage.add_report('alice', 10, '2026-01-01', 'M', 'alpha')
+        self.assertEqual(storage.search_reports('alice', 'alpha')['total'], 1)  # Index aufgebaut
+        storage.add_report('alice', 10, '2026-01-02', 'M', 'alpha beta')
+        self.assertEqual(storage.search_reports('alice', 'alpha')['total'], 2)
+        report_id = storage.search_reports('alice', 'beta')['reports'][0]['id']
+        storage.delete_report_by_id('alice', report_id)
+        self.assertEqual(storage.search_reports('alice', 'beta')['total'], 0)
+        page = storage.search_reports('alice', 'alpha', page=2, per_page=1)
+        self.assertEqual((page['total'], page['has_next'], page['reports']), (1, False, []))
+
+
+def _csv(text):
+    # Upload in kleinen Blöcken, damit Zeilen über Blockgrenzen gehen
+    data = text.encode('utf-8')
+    return [data[i:i + 7] for i in range(0, len(data), 7)]
+
+
+class ImportTests(StorageTestCase):
+
+    CSV = 'Date,Minutes,Module,Content\n2026-01-01,10,M,a\n2026-01-02,20,M,"b, with comma"\n'
+
+    def test_validate_reports_invalid_rows(self):
+        self.assertEqual(imports.validate(_csv(self.CSV)), (2, 0, []))
+        valid, errors, messages = imports.validate(_csv('date,minutes,module,content\n2026-13-01,x,M,a\n2026-01-01,5,M,b\n'))
+        self.assertEqual((valid, errors), (1, 1))
+        self.assertTrue(messages[0].startswith('line 2:'))
+        self.assertEqual(imports.validate(_csv('date,minutes\n'))[1:], (1, ['line 1: missing columns: module, content '
+                                                                              '(expected: date,minutes,module,content)']))
+
+    def test_import_modes(self):
+        storage.add_report('alice', 10, '2026-01-01', 'M', 'a')
+        storage.add_report('alice', 99, '2026-01-09', 'M', 'old')
+        # merge: vorhandener Report (gleiches Datum, Modul, Text) wird übersprungen
+        self.assertEqual(storage.append_user_reports('alice', imports.iter_reports(_csv(self.CSV)), merge=True), 1)
+        self.assertEqual(sorted(r['content'] for r in storage.get_reports_for_user('alice')),
+                         ['a', 'b, with comma', 'old'])
+        # append: alles anhängen
+        self.assertEqual(storage.append_user_reports('alice', imports.iter_reports(_csv(self.CSV))), 2)
+        self.assertEqual(len(storage.get_reports_for_user('alice')), 5)
+        # overwrite: nur noch der Import
+        storage.overwrite_user_reports('alice', imports.iter_reports(_csv(self.CSV)))
+        storage.clear_cache()
+        reports = storage.get_reports_for_user('alice')
+        self.assertEqual(sorted((r['minutes'], r['content']) for r in reports), [(10, 'a'), (20, 'b, with comma')])
+        self.assertEqual(len({r['id'] for r in reports}), 2)
+
+
+    def test_overwrite_with_own_reports_keeps_cached_rows(self):
+        # die übergebenen dicts (hier die gecachten Reports selbst) werden nicht verändert
+        storage.add_report('alice', 10, '2026-01-01', 'M', 'a')
+        storage.add_report('alice', 20, '2026-01-02', 'M', 'b')
+        old = storage.get_reports_for_user('alice')
+        old_ids = [r['id'] for r in old]
+        storage.overwrite_user_reports('alice', old)
+        self.assertEqual([r['id'] for r in old], old_ids)
+        self.assertFalse(storage.delete_report_by_id('alice', old_ids[0]))
+        reports = storage.get_reports_for_user('alice')
+        self.assertEqual(sorted(r['content'] for r in reports), ['a', 'b'])
+        self.assertFalse({r['id'] for r in reports} & set(old_ids))
+        self.assertTrue(storage.delete_report_by_id('alice', reports[0]['id']))
+        self.assertEqual(len(storage.get_reports_for_user('alice')), 1)
+
+
+@override_settings(ACCOUNTS_REPORTS_BACKEND='journal')
+class JournalTests(StorageTestCase):
+
+    def test_concurrent_readers_do_not_replay_own_writes_twice(self):
+        # Leser spielen das Journal nach, während derselbe Prozess anhängt: kein Eintrag doppelt
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                storage.get_reports_for_user('alice')
+
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        for t in readers:
+            t.start()
+        try:
+            for i in range(300):
+                storage.add_report('alice', 1, '2026-01-01', 'M', str(i))
+        finally:
+            stop.set()
+            for t in readers:
+                t.join()
+        ids = [r['id'] for r in storage.get_reports_for_user('alice')]
+        self.assertEqual(len(ids), 300)
+        self.assertEqual(len(set(ids)), 300)
+        self.assertEqual(storage.compact_reports(), 300)
+        storage.clear_cache()
+        self.assertEqual(len(storage.get_reports_for_user('alice')), 300)
+
+
+@override_settings(ACCOUNTS_REPORTS_BACKEND='journal')
+class ConcurrentReadTests(StorageTestCase):
+
+    def test_readers_during_deletes_and_rebuild(self):
+        # Leser ohne Sperre sehen nie halb geänderte Indizes (auch nicht während _rebuild nach vielen Löschungen)
+        storage.append_user_reports('alice', [
+            {'minutes': 1, 'date': f'2026-01-{i % 28 + 1:02d}', 'module': 'M', 'content': f'word {i}'} for i in range(3000)])
+        ids = [r['id'] for r in storage.get_reports_for_user('alice')]
+        storage.search_reports('alice', 'word')  # Volltext-Index aufbauen, damit er mitgepflegt wird
+        stop = threading.Event()
+        errors = []
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    checks = [
+                        storage.get_reports_page('alice')['reports'],
+                        storage.get_reports_for_user('alice'),
+                        storage.get_reports_in_range('alice', '2026-01-05', '2026-01-20'),
+                        storage.search_reports('alice', 'word')['reports'],
+                        list(storage.iter_reports_for_user('alice')),
+                    ]
+                    for reports in checks:
+                        for r in reports:
+                            r.get('id')
+                    storage.summarize_reports('alice')
+                    storage.organisation_summary()
+            except Exception as exc:
+                errors.append(exc)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Threads möglichst oft wechseln lassen
+        self.addCleanup(sys.setswitchinterval, interval)
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        for t in readers:
+            t.start()
+        try:
+            for report_id in ids[:2500]:
+                storage.delete_report_by_id('alice', report_id)
+                storage.add_report('bob', 1, '2026-01-01', 'M', 'x')
+        finally:
+            stop.set()
+            for t in readers:
+                t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(storage.get_reports_for_user('alice')), 500)
+
+
+class ReportsTableTests(SimpleTestCase):
+
+    def test_rebuild_sorts_date_index_per_user(self):
+        days = [(i * 7) % 28 + 1 for i in range(200)]  # Datei-Reihenfolge nicht nach Datum
+        reports = [{'id': f'r{i}', 'username': 'alice' if i % 2 else 'bob', 'minutes': 1,
+                    'date': f'2026-01-{day:02d}', 'module': 'M', 'content': ''} for i, day in enumerate(days)]
+        table = storage._ReportsTable(reports)
+        for username, entries in table.by_user_date.items():
+            self.assertEqual(entries, sorted(entries))
+        in_range = table.reports_at(table.positions_in_range('alice', '2026-01-05', '2026-01-10'))
+        self.assertEqual(sorted(r['id'] for r in in_range),
+                         sorted(r['id'] for r in reports
+                                if r['username'] == 'alice' and '2026-01-05' <= r['date'] <= '2026-01-10'))
+        table.append({'id': 'new', 'username': 'alice', 'minutes': 1, 'date': '2026-01-03', 'module': 'M', 'content': ''})
+        self.assertEqual(table.by_user_date['alice'], sorted(table.by_user_date['alice']))
+
+
+class ExportTests(StorageTestCase):
+
+    def setUp(self):
+        super().setUp()
+        storage.append_user_reports('alice', [  # mehr als exports.CHUNK_REPORTS -> mehrere Blöcke
+            {'minutes': i, 'date': f'2026-01-{i % 28 + 1:02d}', 'module': 'M', 'content': f'Text <{i}> "ä"'}
+            for i in range(1200)])
+
+    def test_streamed_formats_match_whole_serialization(self):
+        reports = storage.get_reports_for_user('alice')
+        self.assertEqual(json.loads(''.join(exports.iter_json(storage.iter_reports_for_user('alice')))), reports)
+        self.assertEqual(''.join(exports.iter_json(iter([]))), '[]')
+        lines = ''.join(exports.iter_ndjson(storage.iter_reports_for_user('alice'))).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], reports)
+        rows = ''.join(exports.iter_csv(storage.iter_reports_for_user('alice'))).splitlines()
+        self.assertEqual(rows[0], 'date,minutes,module,content')
+        self.assertEqual(len(rows), len(reports) + 1)
+        self.assertGreater(len(list(exports.iter_csv(storage.iter_reports_for_user('alice')))), 1)
+
+    def test_gzip_formats_decompress_to_plain_output(self):
+        for fmt in ('json', 'csv', 'ndjson'):
+            serialize = exports.FORMATS[fmt][0]
+            gz_serialize = exports.FORMATS[fmt + '.gz'][0]
+            plain = ''.join(serialize(storage.iter_reports_for_user('alice')))
+            packed = b''.join(gz_serialize(storage.iter_reports_for_user('alice')))
+            self.assertEqual(gzip.decompress(packed).decode('utf-8'), plain)
+
+    def test_range_export_sorted_by_date(self):
+        reports = list(storage.iter_reports_for_user('alice', '2026-01-05', '2026-01-06'))
+        self.assertEqual(len(reports), sum(1 for i in range(1200) if i % 28 + 1 in (5, 6)))
+        self.assertEqual([r['date'] for r in reports], sorted(r['date'] for r in reports))
+
+    def test_deleted_reports_skipped_while_streaming(self):
+        stream = storage.iter_reports_for_user('alice')
+        first = next(stream)
+        storage.delete_reports('alice', 1, '2026-01-02', 'M', 'Text <1> "ä"')
+        self.assertNotIn(1, [r['minutes'] for r in stream])
+        self.assertEqual(first['minutes'], 0)
+
+
+@override_settings(ACCOUNTS_REPORTS_BACKEND='journal')
+class JournalReplayTests(StorageTestCase):
+
+    def test_changes_replayed_from_journal_and_compacted(self):
+        store = storage._main_store
+        storage.add_report('alice', 10, '2026-01-01', 'M', 'a')
+        with open(store.path, encoding='utf-8') as f:
+            snapshot = f.read()
+        storage.add_report('alice', 20, '2026-01-02', 'M', 'b')
+        storage.add_report('bob', 30, '2026-01-03', 'M', 'c')
+        storage.delete_report_by_id('alice', storage.get_reports_for_user('alice')[0]['id'])
+        storage.overwrite_user_reports('bob', [{'minutes': 5, 'date': '2026-02-01', 'module': 'X', 'content': 'new'}])
+        with open(store.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), snapshot)  # Snapshot unverändert, Änderungen nur im Journal
+        with open(store.journal_path, encoding='utf-8') as f:
+            ops = [json.loads(line)['op'] for line in f]
+        self.assertEqual(ops, ['base', 'add', 'add', 'add', 'delete_id', 'replace_user'])  # base: Kopfzeile zum Snapshot
+        storage.clear_cache()
+        self.assertEqual([r['content'] for r in storage.get_reports_for_user('alice')], ['b'])
+        self.assertEqual([r['content'] for r in storage.get_reports_for_user('bob')], ['new'])
+
+        self.assertEqual(storage.compact_reports(), 2)
+        with open(store.journal_path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['op'] for line in f], ['base'])  # neues, leeres Journal
+        with open(store.path, encoding='utf-8') as f:
+            self.assertEqual(sorted(r['content'] for r in json.load(f)), ['b', 'new'])
+        storage.add_report('alice', 1, '2026-03-01', 'M', 'after')  # Snapshot + neues Journal
+        storage.clear_cache()
+        self.assertEqual(sorted(r['content'] for r in storage.get_reports_for_user('alice')), ['after', 'b'])
+
+    def test_torn_last_journal_line_is_ignored(self):
+        storage.add_report('alice', 10, '2026-01-01', 'M', 'a')
+        with open(storage._main_store.journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "add", "rep')  # abgebrochener Schreibvorgang
+        storage.clear_cache()
+        self.assertEqual([r['content'] for r in storage.get_reports_for_user('alice')], ['a'])
+        storage.add_report('alice', 20, '2026-01-02', 'M', 'b')
+        storage.clear_cache()
+        self.assertEqual(sorted(r['content'] for r in storage.get_reports_for_user('alice')), ['a', 'b'])
+
+
+@override_settings(ACCOUNTS_REPORTS_LAYOUT='sharded', ACCOUNTS_REPORTS_SHARDS=4)
+class ShardTests(StorageTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(storage, '_SHARD_DIR', os.path.join(self.tmp, 'work_reports'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(storage._forget_shards)
+        storage._forget_shards()
+        self.users = [f'u{i}' for i in range(20)]
+        for i, username in enumerate(self.users):
+            storage.append_user_reports(username, [
+                {'minutes': 10 * (j + 1), 'date': f'2026-01-{j + 1:02d}', 'module': f'M{j % 2}', 'content': 'x'}
+                for j in range(i % 3 + 1)])
+
+    def _shard_reports(self):
+        reports = {}
+        for store in storage._all_stores():
+            with open(store.path, encoding='utf-8') as f:
+                reports[os.path.basename(store.path)] = json.load(f)
+        return reports
+
+    def test_each_user_in_own_shard(self):
+        files = self._shard_reports()
+        self.assertLessEqual(len(files), 4)
+        for name, reports in files.items():
+            for r in reports:
+                self.assertEqual(os.path.basename(storage._store_for(r['username']).path), name)
+        storage.clear_cache()
+        self.assertEqual(sum(1 for _ in storage.iter_all_reports()), sum(i % 3 + 1 for i in range(20)))
+        self.assertEqual(len(storage.get_reports_for_user('u2')), 3)
+
+    def test_change_writes_only_own_shard(self):
+        before = {name: len(reports) for name, reports in self._shard_reports().items()}
+        storage.add_report('u5', 1, '2026-02-01', 'M', 'new')
+        after = {name: len(reports) for name, reports in self._shard_reports().items()}
+        own = os.path.basename(storage._store_for('u5').path)
+        self.assertEqual(after, dict(before, **{own: before[own] + 1}))
+
+    def test_organisation_summary_over_shards(self):
+        summary = storage.organisation_summary()
+        self.assertEqual(summary['total_minutes'], sum(10 * (j + 1) for i in range(20) for j in range(i % 3 + 1)))
+        storage.clear_cache()
+        self.assertEqual(storage.organisation_summary(), summary)
+
+    def test_merge_and_split_round_trip(self):
+        ids = sorted(r['id'] for r in storage.iter_all_reports())
+        with override_settings(BASE_DIR=self.tmp):
+            self.assertEqual(storage.merge_report_shards(), len(ids))
+            with self.assertRaises(ValueError):
+                storage.split_reports_into_shards(2)
+            self.assertEqual(storage.split_reports_into_shards(2, force=True), len(ids))
+        self.assertEqual(storage._shard_count(), 2)
+        self.assertEqual(sorted(r['id'] for r in storage.iter_all_reports()), ids)
+
+
+class AddUserTests(SimpleTestCase):
+
+    def test_existing_user_rejected_before_hashing(self):
+        table = storage._UsersTable([{'username': 'alice', 'email': 'Alice@example.com', 'password': 'x'}])
+        with mock.patch.object(storage, '_users_table', return_value=table), \
+                mock.patch.object(storage.passwords, 'hash_password') as hash_password:
+            self.assertEqual(storage.add_user({'username': 'alice', 'email': 'new@example.com', 'password': 'pw'}),
+                             (False, 'username exists'))
+            self.assertEqual(storage.add_user({'username': 'bob', 'email': 'alice@example.com', 'password': 'pw'}),
+                             (False, 'email exists'))
+        hash_password.assert_not_called()
+
+    def test_user_added_while_hashing_rejected(self):
+        # zwischen Hash (ohne Sperre) und Einfügen parallel angelegt -> unter der Sperre erneut geprüft
+        table = storage._UsersTable([])
+
+        def hash_and_race(password):
+            table.append({'username': 'bob', 'email': 'bob@example.com', 'password': 'x'})
+            return 'hashed'
+        with mock.patch.object(storage, '_users_table', return_value=table), \
+                mock.patch.object(storage.passwords, 'hash_password', side_effect=hash_and_race), \
+                mock.patch.object(storage, '_persist_users_table') as persist:
+            self.assertEqual(storage.add_user({'username': 'bob', 'email': 'other@example.com', 'password': 'pw'}),
+                             (False, 'username exists'))
+        persist.assert_not_called()
+        self.assertEqual(len(table.users), 1)
+
+
+class BenchLoginTests(SimpleTestCase):
+
+    def test_bench_login_reports_cold_and_warm_runs(self):
+        out = io.StringIO()
+        call_command('bench_login', users=3, requests=6, concurrency=2, iterations=1000, json=True, stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual([r['mode'] for r in results], ['kalt', 'warm'])
+        self.assertEqual([r['requests'] for r in results], [3, 6])
+        self.assertTrue(all(r['users'] == 3 and r['iterations'] == 1000 for r in results))
+
+
+class RequestTimingsTests(SimpleTestCase):
+
+    def test_concurrent_adds_are_all_counted(self):
+        timings = metrics.RequestTimings()
+
+        def worker():
+            for _ in range(2000):
+                timings.add('storage_read', 0.001, 10)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        (phase, (seconds, count, nbytes)), = timings.items()
+        self.assertEqual((phase, count, nbytes), ('storage_read', 8000, 80000))
+        self.assertIn('storage_read;dur=', timings.server_timing(0.5))
@@ -13,11 +13,23 @@ urlpatterns = [
     path('user/request-upgrade/', views.request_upgrade, name='request_upgrade'),  # Endpoint, wenn Nutzer Upgrade anfragt
     path('user/accept-upgrade/', views.accept_upgrade, name='accept_upgrade'),  # Admin akzeptiert Upgrade-Anfrage
     path('user/deny-upgrade/', views.deny_upgrade, name='deny_upgrade'),  # Admin lehnt Upgrade-Anfrage ab
+    path('user/analytics/', views.admin_analytics, name='admin_analytics'),  # Admin-Auswertung über alle Nutzer
     # Endpoint zum Erstellen von Arbeitsberichten
     path('reports/create/', views.create_report, name='create_report'),
+    # weitere Seite der Reports als JSON (für "Load more" auf der Startseite)
+    path('reports/page/', views.reports_page, name='reports_page'),
+    # Volltextsuche in Modul/Text der eigenen Reports (JSON)
+    path('reports/search/', views.search_reports, name='search_reports'),
     # delete report endpoint
     path('reports/delete/', views.delete_report , name='delete_report'),
+    path('reports/delete/<str:report_id>/', views.delete_report_by_id, name='delete_report_by_id'),  # löscht über die Report-ID
     # export und upload (nur für VIP/Admin)
     path('reports/export/', views.export_reports, name='export_reports'),
     path('reports/upload/', views.upload_reports, name='upload_reports'),
+    # Admin: Export aller Nutzer als Hintergrund-Job (starten, Fortschritt, Download)
+    path('reports/export/all/', views.start_export_job, name='start_export_job'),
+    path('reports/export/jobs/<str:job_id>/', views.export_job_status, name='export_job_status'),
+    path('reports/export/jobs/<str:job_id>/download/', views.export_job_download, name='export_job_download'),
+    # Zeitmessungen (Histogramme pro Phase/Route) dieses Prozesses, nur Admin oder ACCOUNTS_METRICS_ALLOWED_IPS
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -1,33 +1,39 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import redirect
+from django.shortcuts import render as _render_template
 from django.urls import reverse
+from django.conf import settings
 from django.core import signing
-from django.core.signing import BadSignature, SignatureExpired
-from django.http import HttpResponseForbidden, HttpResponse, HttpResponseBadRequest  # HTTP-Antwort für unautorisierte Zugriffe
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponseForbidden, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse  # HTTP-Antwort für unautorisierte Zugriffe
 from .forms import RegisterForm, LoginForm, WorkReportForm
-from . import storage
-import io
-import csv
-import json
-import xml.etree.ElementTree as ET
-
-# cookie settings
-_COOKIE_NAME = 'acct_user'  # Name des Cookies, das den angemeldeten Nutzer speichert
-_COOKIE_SALT = 'accounts-salt'  # Salt für das Signieren des Cookie-Inhalts
-_COOKIE_MAX_AGE = 60 * 60 * 24 * 7  # Lebensdauer des Cookies in Sekunden (eine Woche) 
+from . import bulk_export, exports, imports, metrics, middleware, storage
+import asyncio
+import datetime
+import os
+
+# cookie settings (gemeinsam mit accounts/middleware.py, die das Cookie liest)
+_COOKIE_NAME = middleware.COOKIE_NAME
+_COOKIE_SALT = middleware.COOKIE_SALT
+_COOKIE_MAX_AGE = middleware.COOKIE_MAX_AGE
+
+_REPORTS_PER_PAGE = 50  # Anzahl Reports pro Seite in der Tabelle auf der Startseite
+_USERS_PER_PAGE = 50  # Admin-Nutzerliste im Profil: Nutzer pro Seite
+_ROLES = ('user', 'vip', 'admin')  # gültige Werte für den Rollenfilter der Admin-Nutzerliste
+_ANALYTICS_TOP_USERS = 50  # Admin-Auswertung: so viele Nutzer (nach Minuten) werden angezeigt
+_ANALYTICS_WEEKS = 52  # Admin-Auswertung: so viele Wochen (die neuesten) werden angezeigt
+
+def render(request, template_name, context=None):
+    # wie django.shortcuts.render; die Dauer landet als Phase 'render' im Server-Timing
+    with metrics.timed('render'):
+        return _render_template(request, template_name, context)
 
 def _read_user_from_cookie(request):
-    cookie = request.COOKIES.get(_COOKIE_NAME)
-    if not cookie:
-        return None
-    try:
-        # signiertes Token entschlüsseln/prüfen; max_age schützt gegen veraltete Cookies
-        data = signing.loads(cookie, salt=_COOKIE_SALT, max_age=_COOKIE_MAX_AGE)
-        # data expected to be dict with username and email
-        if isinstance(data, dict) and 'username' in data:
-            return data
-    except (BadSignature, SignatureExpired):
-        pass  # bei ungültiger Signatur oder abgelaufenem Token -> anonym
-    return None
+    # pro Request nur einmal dekodiert (AccountUserMiddleware), role/upgrade_requested aus dem Storage
+    return middleware.get_request_user(request)
+
+async def _aread_user_from_cookie(request):
+    # für async Views: falls die Middleware fehlt, wird im Storage-Pool nachgeschlagen (blockiert die Event-Loop nicht)
+    return await middleware.aget_request_user(request)
 
 def _set_user_cookie(response, userdict):
     # signiert userdict und setzt ein HttpOnly-Cookie (keine JS-Zugriffe)
@@ -38,18 +44,98 @@ def _clear_user_cookie(response):
     # löscht das Cookie (Abmelden)
     response.delete_cookie(_COOKIE_NAME)
 
-def home(request):
+def _date_range(request):
+    # liest den Zeitraum aus den GET-Parametern from/to (YYYY-MM-DD, leer = offen); ungültiges Datum -> ValueError
+    date_from = request.GET.get('from') or None
+    date_to = request.GET.get('to') or None
+    for value in (date_from, date_to):
+        if value:
+            datetime.date.fromisoformat(value)
+    return date_from, date_to
+
+def _page_number(request):
+    # ?page=N (ab 1); ungültige Werte -> erste Seite
+    try:
+        return max(int(request.GET.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+def _without_page(params):
+    # Query-String ohne page, mit '&' am Ende, falls nicht leer (danach folgt 'page=N')
+    params = params.copy()
+    params.pop('page', None)
+    encoded = params.urlencode()
+    return encoded + '&' if encoded else ''
+
+# async: Storage-Zugriffe laufen im Storage-Pool (accounts/storage.py, Async-API), unter ASGI
+# belegt ein wartender Request so keinen Thread
+async def home(request):
     # liest den angemeldeten User aus dem Cookie und übergibt ihn an das Template
-    user = _read_user_from_cookie(request)
+    user = await _aread_user_from_cookie(request)
     # bereite das leere Formular und die Reports des Benutzers vor
     report_form = WorkReportForm()  # leeres Formular zum Erstellen eines Berichts
-    user_reports = []
+    reports_page = None  # eine Seite der Reports (neueste zuerst), weitere per "Load more"
     report_summary = None  # neu: Zusammenfassung initialisieren
+    report_rollup = None  # nur berechnet, wenn der Summary-Tab gefiltert wurde (kostet O(Reports des Nutzers))
+    # Zeitraum + Periode für den Summary-Tab (?from=...&to=...&period=day|week|month)
+    try:
+        date_from, date_to = _date_range(request)
+    except ValueError:
+        date_from = date_to = None  # ungültige Eingabe -> gesamter Zeitraum
+    period = request.GET.get('period', 'month')
+    if period not in storage.ROLLUP_PERIODS:
+        period = 'month'
+    query = request.GET.get('q', '').strip()  # Volltextsuche in den Reports (?q=...)
+    # nach dem Filtern direkt den Summary-Tab zeigen
+    show_summary = any(key in request.GET for key in ('from', 'to', 'period'))
     if user:
-        user_reports = storage.get_reports_for_user(user.get('username'))  # lade Reports für aktuellen Nutzer
-        # neu: berechne Summary (total + pro Modul) und gib sie ans Template weiter
-        report_summary = storage.summarize_reports(user.get('username'))
-    return render(request, 'accounts/home.html', {'user': user, 'report_form': report_form, 'reports': user_reports, 'report_summary': report_summary})
+        username = user.get('username')
+        if query:
+            page = storage.asearch_reports(username, query, _page_number(request), _REPORTS_PER_PAGE)
+        else:
+            page = storage.aget_reports_page(username, _page_number(request), _REPORTS_PER_PAGE)
+        # Seite, Summary (total + pro Modul; ohne Zeitraum aus den laufend mitgeführten Summen) und
+        # ggf. Rollup gleichzeitig abfragen; die Report-Datei wird dabei höchstens einmal geladen
+        queries = [page, storage.asummarize_reports(username, date_from, date_to)]
+        if show_summary:
+            queries.append(storage.arollup_reports(username, period, date_from, date_to))
+        reports_page, report_summary, *rollup = await asyncio.gather(*queries)
+        report_rollup = rollup[0] if rollup else None
+    return render(request, 'accounts/home.html', {
+        'user': user, 'report_form': report_form, 'report_summary': report_summary,
+        'reports': reports_page['reports'] if reports_page else [], 'reports_page': reports_page,
+        'report_rollup': report_rollup, 'summary_from': date_from or '', 'summary_to': date_to or '',
+        'summary_period': period, 'query': query, 'show_summary': show_summary,
+        # aktuelle Parameter (q, from, to, period) ohne page für den "Load more"-Link ohne JS
+        'page_query': _without_page(request.GET),
+    })
+
+# JSON-Fragment für "Load more": weitere Seite der Reports ohne die ganze Startseite neu zu rendern
+def reports_page(request):
+    current_user = _read_user_from_cookie(request)
+    if not current_user:
+        return HttpResponseForbidden("Forbidden")
+    page = storage.get_reports_page(current_user.get('username'), _page_number(request), _REPORTS_PER_PAGE)
+    return _reports_page_json(page)
+
+# Volltextsuche als JSON (?q=wort1 wort2&page=N): Reports, deren Modul/Text alle Wörter enthalten
+def search_reports(request):
+    current_user = _read_user_from_cookie(request)
+    if not current_user:
+        return HttpResponseForbidden("Forbidden")
+    query = request.GET.get('q', '').strip()
+    page = storage.search_reports(current_user.get('username'), query, _page_number(request), _REPORTS_PER_PAGE)
+    return _reports_page_json(page)
+
+def _reports_page_json(page):
+    rows = [{
+        'id': r.get('id'),
+        'date': r.get('date', ''),
+        'minutes': r.get('minutes', 0),
+        'module': r.get('module', ''),
+        'content': r.get('content', ''),
+    } for r in page['reports']]
+    return JsonResponse({'reports': rows, 'page': page['page'], 'total': page['total'], 'has_next': page['has_next']})
 
 def register(request):
     if request.method == 'POST':
@@ -79,13 +165,14 @@ def register(request):
     current_user = _read_user_from_cookie(request)  # liest signiertes Cookie falls vorhanden
     return render(request, 'accounts/register.html', {'form': form, 'user': current_user})  # user in context
 
-def login_view(request):
+# async: die Passwort-Prüfung (PBKDF2) läuft im Thread-Pool von accounts/passwords.py statt einen Worker zu blockieren
+async def login_view(request):
     if request.method == 'POST':
         form = LoginForm(request.POST)
         if form.is_valid():
             username = form.cleaned_data['username'].strip()
             password = form.cleaned_data['password']
-            user = storage.authenticate(username, password)
+            user = await storage.aauthenticate(username, password)
             if user:
                 # bei erfolgreicher Authentifizierung: Cookie setzen und weiterleiten
                 resp = redirect(reverse('accounts:home'))
@@ -96,7 +183,7 @@ def login_view(request):
     else:
         form = LoginForm()
     # provide 'user' so base.html can render the top-right link/status consistently
-    current_user = _read_user_from_cookie(request)  # liest signiertes Cookie falls vorhanden
+    current_user = await _aread_user_from_cookie(request)  # liest signiertes Cookie falls vorhanden
     return render(request, 'accounts/login.html', {'form': form, 'user': current_user})  # user in context
 
 def logout_view(request):
@@ -114,17 +201,38 @@ def profile(request):
     # prepare context always including the current user
     context = {'user': current_user}
 
-    # wenn der eingeloggte Nutzer die Rolle 'admin' hat, lade alle User aus der JSON-Datei
+    # wenn der eingeloggte Nutzer die Rolle 'admin' hat, lade eine Seite der User-Liste (mit Suche/Rollenfilter)
     if current_user.get('role') == 'admin':
-        users = storage.load_users()  # lade vollständige User-Liste aus accounts.json
-        context['users'] = users  # füge die Liste zum Template-Kontext hinzu (nur für Admins sichtbar)
-        # neu: erzeuge eine Liste mit den Nutzern, die ein Upgrade angefragt haben
-        pending = [u for u in users if u.get('upgrade_requested')]  # list comprehension filtert Anfragen
-        context['pending'] = pending  # füge pending-Requests zum Kontext hinzu
+        query = request.GET.get('q', '').strip()
+        role = request.GET.get('role', '')
+        if role not in _ROLES:
+            role = ''  # unbekannte Rolle -> kein Filter
+        result = storage.search_users(query, role or None, _page_number(request), _USERS_PER_PAGE)
+        context['users'] = result['users']  # nur die aktuelle Seite (nur für Admins sichtbar)
+        context['users_page'] = result
+        context['query'] = query
+        context['role_filter'] = role
+        # neu: Nutzer, die ein Upgrade angefragt haben (eigene, indizierte Abfrage statt Filter über alle Nutzer)
+        context['pending'] = storage.pending_upgrades()
+        context['is_admin_view'] = True
 
     # render profile template mit user (und ggf. users, pending)
     return render(request, 'accounts/user.html', context)
 
+# neu: Admin-Auswertung über alle Nutzer (Summen werden im Storage mitgeführt, nicht pro Request berechnet)
+def admin_analytics(request):
+    current_user = _read_user_from_cookie(request)
+    if not current_user or current_user.get('role') != 'admin':
+        return HttpResponseForbidden("Forbidden")
+    summary = storage.organisation_summary()
+    context = {
+        'user': current_user,
+        'summary': summary,
+        'top_users': summary['by_user'][:_ANALYTICS_TOP_USERS],
+        'weeks': summary['by_week'][-_ANALYTICS_WEEKS:],  # nur die letzten Wochen anzeigen
+    }
+    return render(request, 'accounts/analytics.html', context)
+
 # new: POST-endpoint, nur Admins dürfen Rollen anderer Nutzer ändern
 def change_role(request):
     # lese aktuell angemeldeten Nutzer aus Cookie
@@ -203,10 +311,10 @@ def deny_upgrade(request):
     return redirect(reverse('accounts:profile'))
 
 # neu: POST-Endpoint zum Anlegen eines Arbeitsberichts
-def create_report(request):
+async def create_report(request):
     if request.method != 'POST':
         return redirect(reverse('accounts:home'))
-    current_user = _read_user_from_cookie(request)
+    current_user = await _aread_user_from_cookie(request)
     if not current_user:
         return redirect(reverse('accounts:login'))  # nur angemeldete Nutzer dürfen Berichte anlegen
     form = WorkReportForm(request.POST)
@@ -216,7 +324,7 @@ def create_report(request):
         module = form.cleaned_data['module']
         content = form.cleaned_data['content']
         # speichere den Bericht in der JSON (owner = username)
-        storage.add_report(current_user.get('username'), minutes, date, module, content)
+        await storage.aadd_report(current_user.get('username'), minutes, date, module, content)
     # egal ob Erfolg oder nicht, zurück zur Startseite
     return redirect(reverse('accounts:home'))
 
@@ -237,6 +345,17 @@ def delete_report(request):
     # egal ob Erfolg oder nicht, zurück zur Startseite
     return redirect(reverse('accounts:home'))
 
+# neu: löscht genau einen Report über seine ID (Formular in home.html)
+def delete_report_by_id(request, report_id):
+    if request.method != 'POST':
+        return redirect(reverse('accounts:home'))
+    current_user = _read_user_from_cookie(request)
+    if not current_user:
+        return redirect(reverse('accounts:login'))  # nur angemeldete Nutzer dürfen Berichte löschen
+    # nur eigene Reports; unbekannte IDs werden ignoriert
+    storage.delete_report_by_id(current_user.get('username'), report_id)
+    return redirect(reverse('accounts:home'))
+
 def _role_is_vip_or_admin(userdict):
     # helper: prüft ob Rolle 'vip' oder 'admin' ist
     if not userdict:
@@ -244,50 +363,95 @@ def _role_is_vip_or_admin(userdict):
     return userdict.get('role') in ('vip', 'admin')
 
 # new: export user's reports in json/csv/xml (GET param 'format')
-def export_reports(request):
-    current_user = _read_user_from_cookie(request)
+async def export_reports(request):
+    current_user = await _aread_user_from_cookie(request)
     if not current_user or not _role_is_vip_or_admin(current_user):
         return HttpResponseForbidden("Forbidden")  # nur VIP/Admin erlaubt
 
     fmt = request.GET.get('format', 'json').lower()
     username = current_user.get('username')
-    reports = storage.get_reports_for_user(username)
-
-    if fmt == 'json':
-        payload = json.dumps(reports, ensure_ascii=False, indent=2)
-        resp = HttpResponse(payload, content_type='application/json; charset=utf-8')
-        resp['Content-Disposition'] = f'attachment; filename="{username}_reports.json"'
-        return resp
-
-    if fmt == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        # header
-        writer.writerow(['date', 'minutes', 'module', 'content'])
-        for r in reports:
-            writer.writerow([r.get('date', ''), r.get('minutes', 0), r.get('module', ''), r.get('content', '')])
-        resp = HttpResponse(output.getvalue(), content_type='text/csv; charset=utf-8')
-        resp['Content-Disposition'] = f'attachment; filename="{username}_reports.csv"'
-        return resp
-
-    if fmt == 'xml':
-        root = ET.Element('reports')
-        for r in reports:
-            item = ET.SubElement(root, 'report')
-            ET.SubElement(item, 'date').text = str(r.get('date', ''))
-            ET.SubElement(item, 'minutes').text = str(r.get('minutes', 0))
-            ET.SubElement(item, 'module').text = r.get('module', '')
-            ET.SubElement(item, 'content').text = r.get('content', '')
-        xml_bytes = ET.tostring(root, encoding='utf-8', xml_declaration=True)
-        resp = HttpResponse(xml_bytes, content_type='application/xml; charset=utf-8')
-        resp['Content-Disposition'] = f'attachment; filename="{username}_reports.xml"'
-        return resp
-
-    return HttpResponseBadRequest("Unknown format")
+    try:
+        date_from, date_to = _date_range(request)  # optionaler Zeitraum ?from=...&to=...
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date")
+    if fmt not in exports.FORMATS:
+        return HttpResponseBadRequest("Unknown format")
+
+    # Reports werden erst beim Senden aus dem Storage gelesen und Stück für Stück serialisiert
+    serialize, content_type, extension = exports.FORMATS[fmt]
+    reports = storage.iter_reports_for_user(username, date_from, date_to)  # optional nur das angefragte Fenster
+    content = serialize(reports)
+    if isinstance(request, ASGIRequest):
+        # ASGI braucht einen async Iterator (einen normalen würde Django erst komplett in eine Liste lesen);
+        # jeder Block wird im Storage-Pool erzeugt. Unter WSGI bleibt es beim normalen Generator.
+        content = storage.aiter_chunks('reports', content, username)
+    resp = StreamingHttpResponse(content, content_type=content_type)
+    # Länge steht erst am Ende fest -> kein Content-Length (chunked). Die .gz-Formate werden bewusst ohne
+    # Content-Encoding gesendet, damit Browser/Clients die komprimierte Datei so speichern, wie sie ist.
+    resp['Content-Disposition'] = f'attachment; filename="{username}_reports.{extension}"'
+    return resp
 
-# new: upload CSV to overwrite user's reports (only VIP/Admin)
-def upload_reports(request):
+def _export_job_json(job):
+    # Status eines Admin-Export-Jobs für die JSON-Endpunkte (inkl. URLs für Polling und Download)
+    data = {key: job.get(key) for key in ('id', 'status', 'format', 'layout', 'requested_by', 'users_total',
+                                          'users_done', 'reports', 'error')}
+    data['status_url'] = reverse('accounts:export_job_status', args=[job['id']])
+    if job.get('status') == 'done':
+        data['download_url'] = reverse('accounts:export_job_download', args=[job['id']])
+    return data
+
+# neu: Admin-Export aller Nutzer; der Request startet nur den Job, das Archiv entsteht im Hintergrund
+def start_export_job(request):
+    current_user = _read_user_from_cookie(request)
+    if not current_user or current_user.get('role') != 'admin':
+        return HttpResponseForbidden("Forbidden")
+    if request.method != 'POST':
+        return redirect(reverse('accounts:profile'))
+    try:
+        job = bulk_export.start_job(current_user.get('username'),
+                                    request.POST.get('format', 'ndjson'), request.POST.get('layout', 'per_user'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    return JsonResponse(_export_job_json(job), status=202)
+
+def export_job_status(request, job_id):
     current_user = _read_user_from_cookie(request)
+    if not current_user or current_user.get('role') != 'admin':
+        return HttpResponseForbidden("Forbidden")
+    job = bulk_export.get_job(job_id)
+    if job is None:
+        raise Http404("Unknown export job")
+    return JsonResponse(_export_job_json(job))
+
+def export_job_download(request, job_id):
+    current_user = _read_user_from_cookie(request)
+    if not current_user or current_user.get('role') != 'admin':
+        return HttpResponseForbidden("Forbidden")
+    job = bulk_export.get_job(job_id)
+    if job is None:
+        raise Http404("Unknown export job")
+    if job.get('status') != 'done':
+        return JsonResponse(_export_job_json(job), status=409)  # noch nicht fertig (oder fehlgeschlagen)
+    # FileResponse liest die Datei blockweise und setzt Content-Length aus der Dateigröße
+    return FileResponse(open(bulk_export.archive_path(job), 'rb'), as_attachment=True,
+                        filename=job['filename'], content_type='application/zip')
+
+# Histogramme der Request-Phasen dieses Prozesses (accounts/metrics.py) als JSON; nur Admin oder
+# ausdrücklich freigegebene Adressen (ACCOUNTS_METRICS_ALLOWED_IPS, z.B. für einen Monitoring-Server).
+# Kein localhost-Automatismus: hinter einem lokalen Reverse-Proxy wäre REMOTE_ADDR immer 127.0.0.1
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'ACCOUNTS_METRICS_ALLOWED_IPS', ()):
+        current_user = _read_user_from_cookie(request)
+        if not current_user or current_user.get('role') != 'admin':
+            return HttpResponseForbidden("Forbidden")
+    data = metrics.snapshot()
+    data['pid'] = os.getpid()
+    data['storage'] = {'cache': storage.cache_stats(), 'io': storage.io_stats()}
+    return JsonResponse(data)
+
+# new: upload CSV to overwrite user's reports (only VIP/Admin)
+async def upload_reports(request):
+    current_user = await _aread_user_from_cookie(request)
     if not current_user or not _role_is_vip_or_admin(current_user):
         return HttpResponseForbidden("Forbidden")
 
@@ -298,26 +462,23 @@ def upload_reports(request):
     if not uploaded:
         return HttpResponseBadRequest("No file uploaded")
 
-    try:
-        # read as text
-        text = uploaded.read().decode('utf-8')
-        reader = csv.DictReader(io.StringIO(text))
-        new_reports = []
-        for row in reader:
-            # expect headers: date, minutes, module, content (case-insensitive)
-            # use safe extraction
-            date = row.get('date') or row.get('Date') or ''
-            minutes = row.get('minutes') or row.get('Minutes') or '0'
-            module = row.get('module') or row.get('Module') or ''
-            content = row.get('content') or row.get('Content') or ''
-            try:
-                minutes_int = int(minutes)
-            except Exception:
-                minutes_int = 0
-            new_reports.append({'date': str(date), 'minutes': minutes_int, 'module': module, 'content': content})
-        # overwrite user's reports
-        storage.overwrite_user_reports(current_user.get('username'), new_reports)
-    except Exception as e:
-        return HttpResponseBadRequest("Invalid CSV file")
-
+    mode = request.POST.get('mode', 'overwrite')
+    if mode not in imports.MODES:
+        return HttpResponseBadRequest("Unknown import mode")
+
+    # 1. Durchlauf: Datei blockweise lesen und jede Zeile validieren (nichts wird geändert)
+    valid, error_count, messages = await storage.arun(imports.validate, uploaded.chunks())
+    if error_count:
+        lines = [f"Invalid CSV file: {error_count} invalid row(s), nothing was imported."] + messages
+        if error_count > len(messages):
+            lines.append(f'... and {error_count - len(messages)} more')
+        return HttpResponseBadRequest('\n'.join(lines), content_type='text/plain; charset=utf-8')
+
+    # 2. Durchlauf: gültige Reports direkt in einem einzigen Storage-Schreibvorgang übernehmen
+    reports = imports.iter_reports(uploaded.chunks())
+    if mode == 'overwrite':
+        await storage.aoverwrite_user_reports(current_user.get('username'), reports)
+    else:
+        # append/merge: nur der Import wird verarbeitet, die bisherigen Reports bleiben unverändert
+        await storage.aappend_user_reports(current_user.get('username'), reports, merge=(mode == 'merge'))
     return redirect(reverse('accounts:home'))